@@ -9,6 +9,7 @@ from bot.handlers import BotHandlers
 from bot.admin_handlers import AdminHandlers
 from trading.signal_processor import SignalProcessor
 from trading.auto_trader import AutoTrader
+from exchanges.balance_checker import BalanceChecker
 
 # Setup logging with directory creation
 os.makedirs('logs', exist_ok=True)
@@ -36,6 +37,13 @@ async def main():
         admin_handlers = AdminHandlers()
         signal_processor = SignalProcessor()
         auto_trader = AutoTrader()
+        auth_managers = (
+            bot_handlers.auth_manager,
+            signal_processor.futures_trader.auth_manager,
+            auto_trader.futures_trader.auth_manager,
+        )
+        for auth_manager in auth_managers:
+            await auth_manager.start()
         
         # Create application
         application = ApplicationBuilder().token(Config.BOT_TOKEN).build()
@@ -118,6 +126,9 @@ async def main():
             await application.updater.stop()
             await application.stop()
             await application.shutdown()
+            await BalanceChecker.close()
+            for auth_manager in auth_managers:
+                await auth_manager.close()
             
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
@@ -24,12 +24,13 @@ class AdminHandlers:
         
         try:
             # Get stats
-            total_users = self.user_model.get_all_users_count()
-            active_users = self.user_model.get_active_users_count(days=7)
+            stats = self.trade_model.get_global_stats()
+            total_users = stats['total_users']
+            active_users = stats['active_users_7d']
             connected_users = len(self.exchange_model.get_all_connected_users())
-            total_trades = self.trade_model.get_total_trades_count()
-            total_volume = self.trade_model.get_total_volume()
-            total_pnl = self.trade_model.get_total_pnl()
+            total_trades = stats['total_trades']
+            total_volume = stats['total_volume']
+            total_pnl = stats['total_pnl']
             
             admin_text = (
                 "🔐 *ADMIN DASHBOARD* 🔐\n\n"
@@ -109,14 +110,15 @@ class AdminHandlers:
         """Show detailed platform statistics"""
         try:
             # Get comprehensive stats
-            total_users = self.user_model.get_all_users_count()
-            active_users_7d = self.user_model.get_active_users_count(days=7)
-            active_users_30d = self.user_model.get_active_users_count(days=30)
+            stats = self.trade_model.get_global_stats()
+            total_users = stats['total_users']
+            active_users_7d = stats['active_users_7d']
+            active_users_30d = stats['active_users_30d']
             connected_users = len(self.exchange_model.get_all_connected_users())
-            total_trades = self.trade_model.get_total_trades_count()
-            successful_trades = self.trade_model.get_successful_trades_count()
-            total_volume = self.trade_model.get_total_volume()
-            total_pnl = self.trade_model.get_total_pnl()
+            total_trades = stats['total_trades']
+            successful_trades = stats['successful_trades']
+            total_volume = stats['total_volume']
+            total_pnl = stats['total_pnl']
             
             # Calculate metrics
             win_rate = (successful_trades / total_trades * 100) if total_trades > 0 else 0
@@ -380,12 +382,13 @@ class AdminHandlers:
         """Show main admin panel"""
         try:
             # Get fresh stats
-            total_users = self.user_model.get_all_users_count()
-            active_users = self.user_model.get_active_users_count(days=7)
+            stats = self.trade_model.get_global_stats()
+            total_users = stats['total_users']
+            active_users = stats['active_users_7d']
             connected_users = len(self.exchange_model.get_all_connected_users())
-            total_trades = self.trade_model.get_total_trades_count()
-            total_volume = self.trade_model.get_total_volume()
-            total_pnl = self.trade_model.get_total_pnl()
+            total_trades = stats['total_trades']
+            total_volume = stats['total_volume']
+            total_pnl = stats['total_pnl']
             
             admin_text = (
                 "🔐 *ADMIN DASHBOARD* 🔐\n\n"
@@ -432,14 +435,15 @@ class AdminHandlers:
         
         try:
             # Get stats
-            total_users = self.user_model.get_all_users_count()
-            active_users = self.user_model.get_active_users_count(days=7)
+            stats = self.trade_model.get_global_stats()
+            total_users = stats['total_users']
+            active_users = stats['active_users_7d']
             connected_users = len(self.exchange_model.get_all_connected_users())
-            total_trades = self.trade_model.get_total_trades_count()
-            successful_trades = self.trade_model.get_successful_trades_count()
+            total_trades = stats['total_trades']
+            successful_trades = stats['successful_trades']
             win_rate = (successful_trades / total_trades * 100) if total_trades > 0 else 0
-            total_volume = self.trade_model.get_total_volume()
-            total_pnl = self.trade_model.get_total_pnl()
+            total_volume = stats['total_volume']
+            total_pnl = stats['total_pnl']
             
             # Get exchange distribution
             exchange_distribution = self.exchange_model.get_exchange_distribution()
@@ -604,7 +608,7 @@ class AdminHandlers:
             await update.message.reply_text("❌ Invalid number format in signal parameters")
         except Exception as e:
             logger.error(f"Signal command error: {e}")
-            await update.message.reply_text(f"❌ Error processing signal: {str(e)}")
+            await update.message.reply_text(f"❌ Error processing signal: {e}")
     
     async def broadcast_command(self, update: Update, context: CallbackContext):
         """Broadcast message to all users"""
@@ -655,7 +659,7 @@ class AdminHandlers:
             
         except Exception as e:
             logger.error(f"Broadcast command error: {e}")
-            await update.message.reply_text(f"❌ Error sending broadcast: {str(e)}")
+            await update.message.reply_text(f"❌ Error sending broadcast: {e}")
     
     async def close_positions_command(self, update: Update, context: CallbackContext):
         """Close all open positions"""
@@ -698,4 +702,4 @@ class AdminHandlers:
             
         except Exception as e:
             logger.error(f"Close positions command error: {e}")
-            await update.message.reply_text(f"❌ Error closing positions: {str(e)}")
+            await update.message.reply_text(f"❌ Error closing positions: {e}")
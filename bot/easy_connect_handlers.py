@@ -1,9 +1,10 @@
+import asyncio
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import CallbackContext
 from exchanges.easy_connect import EasyConnectManager, UserProfiler, LiveSupportManager
 from exchanges.balance_checker import BalanceChecker
-from config.settings import Config
+from config.settings import Config, get_exchange_meta, requires_passphrase
 from database.models import UserModel, ExchangeModel
 
 logger = logging.getLogger(__name__)
@@ -120,7 +121,7 @@ class EasyConnectHandlers:
                 f"✅ **Profile Complete!**\n\n"
                 f"{level_descriptions[user_level]}\n\n"
                 f"🎯 **Perfect Exchange for You:**\n"
-                f"{exchange_info['display_name']} {exchange_info['name']}\n\n"
+                f"{exchange_info.display_name} {exchange_info.name}\n\n"
                 f"🛡️ **Your Safe Settings:**\n"
                 f"• Leverage: {safe_settings['leverage']}x (conservative)\n"
                 f"• Position Size: {safe_settings['position_size']}% per trade\n"
@@ -320,7 +321,7 @@ class EasyConnectHandlers:
                 f"Now send me your API credentials in this format:\n\n"
             )
             
-            if exchange_info['requires_passphrase']:
+            if exchange_info.requires_passphrase:
                 credential_text += (
                     f"📝 **Format:** `API_KEY API_SECRET PASSPHRASE`\n\n"
                     f"**Example:**\n"
@@ -437,15 +438,16 @@ class EasyConnectHandlers:
             
             # Process the credentials
             credentials = update.message.text.split()
-            exchange_info = Config.SUPPORTED_EXCHANGES[exchange]
+            exchange_info = get_exchange_meta(exchange)
             
             # Validate format
-            required_count = 3 if exchange_info['requires_passphrase'] else 2
+            needs_passphrase = requires_passphrase(exchange)
+            required_count = 3 if needs_passphrase else 2
             if len(credentials) < required_count:
                 await update.message.reply_text(
                     f"❌ **Wrong format!**\n\n"
                     f"Please send exactly {required_count} values separated by spaces.\n\n"
-                    f"Expected: {'API_KEY API_SECRET PASSPHRASE' if exchange_info['requires_passphrase'] else 'API_KEY API_SECRET'}"
+                    f"Expected: {'API_KEY API_SECRET PASSPHRASE' if needs_passphrase else 'API_KEY API_SECRET'}"
                 )
                 return True
             
@@ -460,22 +462,21 @@ class EasyConnectHandlers:
                 balance = await BalanceChecker.get_balance(exchange, api_key, api_secret, passphrase)
                 
                 # Save to database
-                encrypted_key, encrypted_secret, encrypted_passphrase = \
-                    self.auth_manager.encrypt_credentials(api_key, api_secret, passphrase)
+                encrypted_credentials = self.auth_manager.encrypt_credentials(api_key, api_secret, passphrase)
                 
-                db_user = self.user_model.get_user(user_id)
+                db_user = await asyncio.to_thread(self.user_model.get_user, user_id)
                 if not db_user:
-                    db_user_id = self.user_model.create_user(user_id)
+                    db_user_id = await self.user_model.a_create_user(user_id)
                 else:
                     db_user_id = db_user['id']
                 
                 # Apply safe settings from profile
                 safe_settings = session.get('safe_settings', {})
                 
-                self.exchange_model.add_exchange(
-                    db_user_id, exchange, encrypted_key, encrypted_secret,
-                    encrypted_passphrase, 'easy_connect',
-                    safe_settings.get('leverage', 10)
+                await self.exchange_model.a_add_exchange(
+                    db_user_id, exchange, encrypted_credentials,
+                    connection_type='easy_connect',
+                    leverage=safe_settings.get('leverage', 10)
                 )
                 
                 # Success!
@@ -492,7 +493,7 @@ class EasyConnectHandlers:
             except Exception as e:
                 await update.message.reply_text(
                     f"❌ **Connection Test Failed**\n\n"
-                    f"Error: `{str(e)}`\n\n"
+                    f"Error: `{e}`\n\n"
                     f"Please check:\n"
                     f"• API keys are correct\n"
                     f"• Futures trading is enabled\n"
@@ -19,12 +19,13 @@ class EnhancedUserHandlers(UserHandlers):
             user = update.effective_user
             
             # Create or get user
-            db_user = self.user_model.get_user(user.id)
+            db_user = await self._get_user_cached(user.id)
             if not db_user:
-                self.user_model.create_user(user.id, user.username, user.first_name, user.last_name)
+                await self.user_model.a_create_user(user.id, user.username, user.first_name, user.last_name)
+                self._invalidate_user(user.id)
             
             # Check if user has exchanges
-            exchanges = self.exchange_model.get_user_exchanges(db_user['id'] if db_user else None)
+            exchanges = await self.exchange_model.a_get_user_exchanges(db_user['id'] if db_user else None)
             
             if not exchanges:
                 # New user - show easy connect
@@ -152,7 +153,7 @@ class EnhancedUserHandlers(UserHandlers):
             keyboard = []
             for exchange_id, exchange_info in Config.SUPPORTED_EXCHANGES.items():
                 keyboard.append([InlineKeyboardButton(
-                    exchange_info['display_name'],
+                    exchange_info.display_name,
                     callback_data=f"manual_{exchange_id}"
                 )])
             
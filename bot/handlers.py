@@ -5,7 +5,7 @@ from database.models import Database, UserModel, ExchangeModel, TradeModel, Port
 from exchanges.auth_manager import ExchangeAuthManager
 from exchanges.balance_checker import BalanceChecker
 from exchanges.futures_trader import FuturesTrader
-from config.settings import Config
+from config.settings import Config, get_exchange_meta, requires_passphrase, exchange_display_name
 import asyncio
 
 logger = logging.getLogger(__name__)
@@ -92,7 +92,7 @@ class BotHandlers:
             keyboard = []
             for exchange_id, exchange_info in Config.SUPPORTED_EXCHANGES.items():
                 keyboard.append([InlineKeyboardButton(
-                    f"{exchange_info['display_name']} Futures",
+                    f"{exchange_info.display_name} Futures",
                     callback_data=f"connect_{exchange_id}"
                 )])
             
@@ -146,7 +146,7 @@ class BotHandlers:
                     )
                     
                     total_balance += balance
-                    exchange_name = Config.SUPPORTED_EXCHANGES[exchange['exchange_name']]['display_name']
+                    exchange_name = exchange_display_name(exchange['exchange_name'])
                     
                     balance_text += (
                         f"🏢 **{exchange_name}**\n"
@@ -158,7 +158,7 @@ class BotHandlers:
                     
                 except Exception as e:
                     logger.error(f"Balance error for {exchange['exchange_name']}: {e}")
-                    exchange_name = Config.SUPPORTED_EXCHANGES[exchange['exchange_name']]['display_name']
+                    exchange_name = exchange_display_name(exchange['exchange_name'])
                     balance_text += (
                         f"🏢 **{exchange_name}**\n"
                         f"❌ Error: `{str(e)[:50]}...`\n\n"
@@ -283,7 +283,7 @@ class BotHandlers:
             keyboard = []
             for exchange_id, exchange_info in Config.SUPPORTED_EXCHANGES.items():
                 keyboard.append([InlineKeyboardButton(
-                    f"{exchange_info['display_name']} Futures",
+                    f"{exchange_info.display_name} Futures",
                     callback_data=f"connect_{exchange_id}"
                 )])
             
@@ -309,10 +309,10 @@ class BotHandlers:
             self.user_sessions[user_id] = {'selected_exchange': exchange}
             
             setup_text = (
-                f"🔐 *CONNECT {exchange_info['display_name']} FUTURES* 🔐\n\n"
+                f"🔐 *CONNECT {exchange_info.display_name} FUTURES* 🔐\n\n"
                 f"📋 **Setup Instructions:**\n\n"
                 f"1️⃣ **Create API Key:**\n"
-                f"   • Visit your {exchange_info['name']} account\n"
+                f"   • Visit your {exchange_info.name} account\n"
                 f"   • Go to API Management\n"
                 f"   • Create new API key\n\n"
                 f"2️⃣ **Set Permissions:**\n"
@@ -321,7 +321,7 @@ class BotHandlers:
                 f"3️⃣ **Send Credentials:**\n"
             )
             
-            if exchange_info['requires_passphrase']:
+            if exchange_info.requires_passphrase:
                 setup_text += (
                     f"   Format: `API_KEY API_SECRET PASSPHRASE`\n"
                     f"   Example: `abc123 xyz789 mypass123`\n\n"
@@ -342,8 +342,8 @@ class BotHandlers:
             
             keyboard = [
                 [InlineKeyboardButton(
-                    f"📚 {exchange_info['name']} API Guide",
-                    url=exchange_info['guide_url']
+                    f"📚 {exchange_info.name} API Guide",
+                    url=exchange_info.guide_url
                 )],
                 [InlineKeyboardButton(
                     "🔙 Choose Different Exchange",
@@ -372,14 +372,15 @@ class BotHandlers:
                 return
             
             credentials = update.message.text.split()
-            exchange_info = Config.SUPPORTED_EXCHANGES[exchange]
+            exchange_info = get_exchange_meta(exchange)
             
             # Validate format
-            required_count = 3 if exchange_info['requires_passphrase'] else 2
+            needs_passphrase = requires_passphrase(exchange)
+            required_count = 3 if needs_passphrase else 2
             if len(credentials) < required_count:
                 await update.message.reply_text(
                     f"❌ Invalid format. Please provide {required_count} values.\n\n"
-                    f"Expected: {'API_KEY API_SECRET PASSPHRASE' if exchange_info['requires_passphrase'] else 'API_KEY API_SECRET'}"
+                    f"Expected: {'API_KEY API_SECRET PASSPHRASE' if needs_passphrase else 'API_KEY API_SECRET'}"
                 )
                 return
             
@@ -394,8 +395,7 @@ class BotHandlers:
                 balance = await BalanceChecker.get_balance(exchange, api_key, api_secret, passphrase)
                 
                 # Encrypt and save
-                encrypted_key, encrypted_secret, encrypted_passphrase = \
-                    self.auth_manager.encrypt_credentials(api_key, api_secret, passphrase)
+                encrypted_credentials = self.auth_manager.encrypt_credentials(api_key, api_secret, passphrase)
                 
                 db_user = self.user_model.get_user(user_id)
                 if not db_user:
@@ -404,12 +404,12 @@ class BotHandlers:
                     user_db_id = db_user['id']
                 
                 self.exchange_model.add_exchange(
-                    user_db_id, exchange, encrypted_key, encrypted_secret,
-                    encrypted_passphrase, 'manual'
+                    user_db_id, exchange, encrypted_credentials,
+                    connection_type='manual'
                 )
                 
                 await update.message.reply_text(
-                    f"✅ *{exchange_info['display_name']} CONNECTED!* ✅\n\n"
+                    f"✅ *{exchange_info.display_name} CONNECTED!* ✅\n\n"
                     f"🔴 **LIVE MAINNET CONNECTION**\n"
                     f"💰 Current Balance: `{balance:,.2f} USDT`\n\n"
                     f"🤖 **Auto-Trading Ready!**\n"
@@ -427,7 +427,7 @@ class BotHandlers:
             except Exception as e:
                 await update.message.reply_text(
                     f"❌ **Connection Failed**\n\n"
-                    f"Error: `{str(e)}`\n\n"
+                    f"Error: `{e}`\n\n"
                     f"Please check:\n"
                     f"• API keys are correct\n"
                     f"• Futures trading enabled\n"
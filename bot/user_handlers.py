@@ -1,15 +1,79 @@
+import asyncio
 import logging
+import string
+import time
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import CallbackContext
 from database.models import Database, UserModel, ExchangeModel, SignalModel, TradeModel
 from exchanges.auth_manager import ExchangeAuthManager
 from exchanges.balance_checker import BalanceChecker
-from config.settings import Config
-import os
+from config.settings import Config, get_exchange_meta, requires_passphrase, exchange_display_name
 
 logger = logging.getLogger(__name__)
 
+BALANCE_ROW_TEMPLATE = (
+    "{exchange_name}\n"
+    "💵 Balance: `{balance:,.2f} USDT`\n"
+    "🔴 Mode: LIVE MAINNET\n"
+    "⚡ Leverage: `{leverage}x`\n"
+    "📈 Position Size: `{position_size_percent}%`\n\n"
+)
+
+BALANCE_ERROR_TEMPLATE = (
+    "{exchange_name}\n"
+    "❌ Error: `{error:.50}...`\n\n"
+)
+
+MANUAL_GUIDE_TMPL = string.Template(
+    "🔐 *Connecting to $display FUTURES*\n\n"
+    "💰 **MAINNET LIVE TRADING SETUP**\n\n"
+    "📋 **Step-by-step setup:**\n\n"
+    "1️⃣ **Create API Key:**\n"
+    "   • Visit: [API Settings]($guide_url)\n"
+    "   • Create new API key for futures trading\n\n"
+    "2️⃣ **Set Permissions (CRITICAL):**\n"
+    "   ✅ Enable: $perms\n"
+    "   ❌ Disable: Withdrawals, Transfers (SECURITY)\n"
+    "   🔒 Add IP restrictions if available\n\n"
+    "3️⃣ **Send Credentials:**\n"
+    "   Send in format: `$credentials_format`\n"
+    "   Example: `$credentials_example`\n\n"
+    "⚠️ **SECURITY WARNINGS:**\n"
+    "• This connects to LIVE MAINNET (real money)\n"
+    "• NEVER enable withdrawal permissions\n"
+    "• Your keys are encrypted with military-grade security\n"
+    "• You can disconnect anytime\n"
+    "• Start with small position sizes\n\n"
+    "🔒 **Ready for LIVE trading?** Send your credentials now:"
+)
+
+TRADE_ROW_TEMPLATE = (
+    "{index}. {status_emoji} **{symbol}** ({side})\n"
+    "   💰 Entry: `${entry_price:,.2f}`\n"
+    "   📊 Size: `{quantity:.4f}`\n"
+    "   💹 PnL: `{pnl:+.2f} USDT`\n"
+    "   🏢 Exchange: {exchange_name}\n"
+    "   📅 {executed_at:.16}\n\n"
+)
+
+CONNECTION_FAILED_TEMPLATE = (
+    "❌ **Connection Failed**\n\n"
+    "Error: `%s`\n\n"
+    "Please check:\n"
+    "• API keys are correct\n"
+    "• Futures trading is enabled\n"
+    "• IP restrictions (if any)\n"
+    "• Exchange API status\n\n"
+    "Try again with correct credentials."
+)
+
+# db_user records cached per Telegram id: (expires_at, record)
+USER_CACHE_TTL = 600
+USER_CACHE_MAXSIZE = 100_000
+
 class UserHandlers:
+    _stmt_subscribe = "UPDATE subscriptions SET is_subscribed = 1 WHERE user_id = ?"
+    
     def __init__(self):
         self.db = Database()
         self.user_model = UserModel(self.db)
@@ -17,6 +81,112 @@ class UserHandlers:
         self.signal_model = SignalModel(self.db)
         self.trade_model = TradeModel(self.db)
         self.auth_manager = ExchangeAuthManager(Config.ENCRYPTION_KEY)
+        self._user_cache = {}
+        self._build_markups()
+        
+        # Substitutions for MANUAL_GUIDE_TMPL, one dict per exchange
+        self._manual_subs = {}
+        for exchange_id, exchange_info in Config.SUPPORTED_EXCHANGES.items():
+            if exchange_id in Config.PASSPHRASE_EXCHANGES:
+                credentials_format = 'API_KEY API_SECRET PASSPHRASE'
+                credentials_example = 'abc123def456 xyz789uvw012 mypassphrase123'
+            else:
+                credentials_format = 'API_KEY API_SECRET'
+                credentials_example = 'abc123def456 xyz789uvw012'
+            self._manual_subs[exchange_id] = {
+                'display': exchange_info.display_name,
+                'guide_url': exchange_info.guide_url,
+                'perms': ', '.join(exchange_info.permissions_required),
+                'credentials_format': credentials_format,
+                'credentials_example': credentials_example
+            }
+    
+    async def _get_user_cached(self, telegram_id: int):
+        """Get the db user for a Telegram id, hitting the database only on a cache miss"""
+        cached = self._user_cache.get(telegram_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
+        db_user = await asyncio.to_thread(self.user_model.get_user, telegram_id)
+        if db_user:
+            if len(self._user_cache) >= USER_CACHE_MAXSIZE:
+                # Drop the oldest entry (dicts keep insertion order)
+                self._user_cache.pop(next(iter(self._user_cache)))
+            self._user_cache[telegram_id] = (time.monotonic() + USER_CACHE_TTL, db_user)
+        return db_user
+    
+    def _invalidate_user(self, telegram_id: int):
+        """Forget the cached db user after a write that touches it"""
+        self._user_cache.pop(telegram_id, None)
+    
+    def _build_markups(self):
+        """Build the static inline keyboards once instead of on every handler call"""
+        self._start_markup = InlineKeyboardMarkup([
+            [
+                InlineKeyboardButton("🔗 Connect Exchange", callback_data="quick_connect"),
+                InlineKeyboardButton("💰 View Balance", callback_data="quick_balance")
+            ],
+            [
+                InlineKeyboardButton("📈 Subscribe to Signals", callback_data="quick_subscribe"),
+                InlineKeyboardButton("📚 Help & Guide", callback_data="quick_help")
+            ]
+        ])
+        
+        # All futures exchanges in rows of 2, followed by the guide button
+        exchange_buttons = [
+            InlineKeyboardButton(exchange_info.display_name, callback_data=f"manual_{exchange_id}")
+            for exchange_id, exchange_info in Config.SUPPORTED_EXCHANGES.items()
+        ]
+        keyboard = [exchange_buttons[i:i + 2] for i in range(0, len(exchange_buttons), 2)]
+        keyboard.append([InlineKeyboardButton("📚 Setup Guides", callback_data="exchange_guides")])
+        self._connect_markup = InlineKeyboardMarkup(keyboard)
+        
+        keyboard = []
+        # OAuth supported exchanges
+        for exchange in ['kucoin', 'bybit', 'okx']:
+            if exchange in Config.SUPPORTED_EXCHANGES:
+                exchange_info = Config.SUPPORTED_EXCHANGES[exchange]
+                keyboard.append([
+                    InlineKeyboardButton(
+                        f"🔗 {exchange_info.display_name} (OAuth)",
+                        callback_data=f"oauth_{exchange}"
+                    ),
+                    InlineKeyboardButton(
+                        f"📝 {exchange_info.display_name} (Manual)",
+                        callback_data=f"manual_{exchange}"
+                    )
+                ])
+        # Manual only exchanges
+        for exchange in ['binance', 'bitget', 'mexc', 'gate', 'huobi', 'bingx']:
+            if exchange in Config.SUPPORTED_EXCHANGES:
+                exchange_info = Config.SUPPORTED_EXCHANGES[exchange]
+                keyboard.append([
+                    InlineKeyboardButton(
+                        f"📝 {exchange_info.display_name} (Manual)",
+                        callback_data=f"manual_{exchange}"
+                    )
+                ])
+        keyboard.append([InlineKeyboardButton("📚 Setup Guides", callback_data="exchange_guides")])
+        self._connection_options_markup = InlineKeyboardMarkup(keyboard)
+        
+        keyboard = [
+            [InlineKeyboardButton(
+                f"{exchange_info.display_name} Futures API Guide",
+                url=exchange_info.guide_url
+            )]
+            for exchange_info in Config.SUPPORTED_EXCHANGES.values()
+        ]
+        keyboard.append([InlineKeyboardButton("🔙 Back to Connect", callback_data="back_to_connect")])
+        self._guides_markup = InlineKeyboardMarkup(keyboard)
+        
+        # Per-exchange keyboard shown under the manual connection guide
+        self._manual_markups = {
+            exchange_id: InlineKeyboardMarkup([
+                [InlineKeyboardButton("📚 Detailed Guide", url=exchange_info.guide_url)],
+                [InlineKeyboardButton("🔙 Back to Exchanges", callback_data="back_to_connect")]
+            ])
+            for exchange_id, exchange_info in Config.SUPPORTED_EXCHANGES.items()
+        }
     
     async def start_command(self, update: Update, context: CallbackContext):
         """Handle /start command"""
@@ -24,9 +194,10 @@ class UserHandlers:
             user = update.effective_user
             
             # Create or get user
-            db_user = self.user_model.get_user(user.id)
+            db_user = await self._get_user_cached(user.id)
             if not db_user:
-                self.user_model.create_user(user.id, user.username, user.first_name, user.last_name)
+                await self.user_model.a_create_user(user.id, user.username, user.first_name, user.last_name)
+                self._invalidate_user(user.id)
             
             welcome_text = (
                 "🚀 *Welcome to Professional Futures Trading Bot!* 🚀\n\n"
@@ -48,19 +219,7 @@ class UserHandlers:
                 "📚 Need help? Use /help for detailed guide"
             )
             
-            keyboard = [
-                [
-                    InlineKeyboardButton("🔗 Connect Exchange", callback_data="quick_connect"),
-                    InlineKeyboardButton("💰 View Balance", callback_data="quick_balance")
-                ],
-                [
-                    InlineKeyboardButton("📈 Subscribe to Signals", callback_data="quick_subscribe"),
-                    InlineKeyboardButton("📚 Help & Guide", callback_data="quick_help")
-                ]
-            ]
-            
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            await update.message.reply_text(welcome_text, reply_markup=reply_markup, parse_mode='Markdown')
+            await update.message.reply_text(welcome_text, reply_markup=self._start_markup, parse_mode='Markdown')
             
         except Exception as e:
             logger.error(f"Error in start_command: {e}")
@@ -69,26 +228,6 @@ class UserHandlers:
     async def connect_command(self, update: Update, context: CallbackContext):
         """Handle /connect command with futures exchanges"""
         try:
-            keyboard = []
-            
-            # Add all futures exchanges in rows of 2
-            exchanges = list(Config.SUPPORTED_EXCHANGES.items())
-            for i in range(0, len(exchanges), 2):
-                row = []
-                for j in range(2):
-                    if i + j < len(exchanges):
-                        exchange_id, exchange_info = exchanges[i + j]
-                        row.append(InlineKeyboardButton(
-                            exchange_info['display_name'],
-                            callback_data=f"manual_{exchange_id}"
-                        ))
-                keyboard.append(row)
-            
-            # Add guide button
-            keyboard.append([InlineKeyboardButton("📚 Setup Guides", callback_data="exchange_guides")])
-            
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
             connect_text = (
                 "🔗 *CONNECT YOUR FUTURES EXCHANGES* 🔗\n\n"
                 "💰 **LIVE MAINNET TRADING**\n"
@@ -110,7 +249,7 @@ class UserHandlers:
                 "• BingX Perpetual Futures"
             )
             
-            await update.message.reply_text(connect_text, reply_markup=reply_markup, parse_mode='Markdown')
+            await update.message.reply_text(connect_text, reply_markup=self._connect_markup, parse_mode='Markdown')
             
         except Exception as e:
             logger.error(f"Error in connect_command: {e}")
@@ -164,40 +303,6 @@ class UserHandlers:
     async def _show_connection_options(self, query):
         """Show connection method options"""
         try:
-            keyboard = []
-        
-            # OAuth supported exchanges
-            oauth_exchanges = ['kucoin', 'bybit', 'okx']
-            for exchange in oauth_exchanges:
-                if exchange in Config.SUPPORTED_EXCHANGES:
-                    exchange_info = Config.SUPPORTED_EXCHANGES[exchange]
-                    keyboard.append([
-                        InlineKeyboardButton(
-                            f"🔗 {exchange_info['display_name']} (OAuth)",
-                            callback_data=f"oauth_{exchange}"
-                        ),
-                        InlineKeyboardButton(
-                            f"📝 {exchange_info['display_name']} (Manual)",
-                            callback_data=f"manual_{exchange}"
-                        )
-                    ])
-        
-            # Manual only exchanges
-            manual_only = ['binance', 'bitget', 'mexc', 'gate', 'huobi', 'bingx']
-            for exchange in manual_only:
-                if exchange in Config.SUPPORTED_EXCHANGES:
-                    exchange_info = Config.SUPPORTED_EXCHANGES[exchange]
-                    keyboard.append([
-                        InlineKeyboardButton(
-                            f"📝 {exchange_info['display_name']} (Manual)",
-                            callback_data=f"manual_{exchange}"
-                        )
-                    ])
-        
-            keyboard.append([InlineKeyboardButton("📚 Setup Guides", callback_data="exchange_guides")])
-        
-            reply_markup = InlineKeyboardMarkup(keyboard)
-        
             connect_text = (
                 "🔗 *CHOOSE CONNECTION METHOD* 🔗\n\n"
                 "💰 **LIVE MAINNET TRADING**\n\n"
@@ -206,7 +311,7 @@ class UserHandlers:
                 "⚠️ **Security:** OAuth is more secure as you never share your API keys directly!"
             )
         
-            await query.edit_message_text(connect_text, reply_markup=reply_markup, parse_mode='Markdown')
+            await query.edit_message_text(connect_text, reply_markup=self._connection_options_markup, parse_mode='Markdown')
         
         except Exception as e:
             logger.error(f"Error in _show_connection_options: {e}")
@@ -216,7 +321,7 @@ class UserHandlers:
         """Handle OAuth connection"""
         try:
             user_id = query.from_user.id
-            callback_url = os.getenv('OAUTH_CALLBACK_URL', 'https://yourdomain.com/oauth/callback')
+            callback_url = Config.OAUTH_CALLBACK_URL or 'https://yourdomain.com/oauth/callback'
         
             oauth_url = self.auth_manager.generate_oauth_url(exchange, user_id, callback_url)
         
@@ -230,7 +335,7 @@ class UserHandlers:
                 exchange_info = Config.SUPPORTED_EXCHANGES[exchange]
             
                 await query.edit_message_text(
-                    f"✅ *OAuth Authorization for {exchange_info['display_name']}*\n\n"
+                    f"✅ *OAuth Authorization for {exchange_info.display_name}*\n\n"
                     f"🔐 **SECURE OAUTH CONNECTION**\n\n"
                     f"Click the button below to securely authorize the connection.\n"
                     f"You'll be redirected back automatically after authorization.\n\n"
@@ -244,7 +349,7 @@ class UserHandlers:
                 )
             else:
                 await query.edit_message_text(
-                    f"❌ OAuth not available for {Config.SUPPORTED_EXCHANGES[exchange]['display_name']}\n\n"
+                    f"❌ OAuth not available for {exchange_display_name(exchange)}\n\n"
                     f"Please use manual API key connection instead."
                 )
         except Exception as e:
@@ -254,56 +359,12 @@ class UserHandlers:
     async def _handle_manual_connection(self, query, exchange: str, context: CallbackContext):
         """Handle manual API key connection"""
         try:
-            exchange_info = Config.SUPPORTED_EXCHANGES[exchange]
+            guide_text = MANUAL_GUIDE_TMPL.safe_substitute(self._manual_subs[exchange])
             
             # Store selected exchange in user data
-            user_id = query.from_user.id
-            if not hasattr(context, 'user_data'):
-                context.user_data = {}
-            context.user_data[user_id] = {'selected_exchange': exchange}
-            
-            guide_text = (
-                f"🔐 *Connecting to {exchange_info['display_name']} FUTURES*\n\n"
-                f"💰 **MAINNET LIVE TRADING SETUP**\n\n"
-                f"📋 **Step-by-step setup:**\n\n"
-                f"1️⃣ **Create API Key:**\n"
-                f"   • Visit: [API Settings]({exchange_info['guide_url']})\n"
-                f"   • Create new API key for futures trading\n\n"
-                f"2️⃣ **Set Permissions (CRITICAL):**\n"
-                f"   ✅ Enable: {', '.join(exchange_info['permissions_required'])}\n"
-                f"   ❌ Disable: Withdrawals, Transfers (SECURITY)\n"
-                f"   🔒 Add IP restrictions if available\n\n"
-                f"3️⃣ **Send Credentials:**\n"
-            )
-            
-            if exchange_info['requires_passphrase']:
-                guide_text += (
-                    f"   Send in format: `API_KEY API_SECRET PASSPHRASE`\n"
-                    f"   Example: `abc123def456 xyz789uvw012 mypassphrase123`\n\n"
-                )
-            else:
-                guide_text += (
-                    f"   Send in format: `API_KEY API_SECRET`\n"
-                    f"   Example: `abc123def456 xyz789uvw012`\n\n"
-                )
+            context.user_data['selected_exchange'] = exchange
             
-            guide_text += (
-                f"⚠️ **SECURITY WARNINGS:**\n"
-                f"• This connects to LIVE MAINNET (real money)\n"
-                f"• NEVER enable withdrawal permissions\n"
-                f"• Your keys are encrypted with military-grade security\n"
-                f"• You can disconnect anytime\n"
-                f"• Start with small position sizes\n\n"
-                f"🔒 **Ready for LIVE trading?** Send your credentials now:"
-            )
-            
-            keyboard = [
-                [InlineKeyboardButton("📚 Detailed Guide", url=exchange_info['guide_url'])],
-                [InlineKeyboardButton("🔙 Back to Exchanges", callback_data="back_to_connect")]
-            ]
-            
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            await query.edit_message_text(guide_text, reply_markup=reply_markup, parse_mode='Markdown')
+            await query.edit_message_text(guide_text, reply_markup=self._manual_markups[exchange], parse_mode='Markdown')
             
         except Exception as e:
             logger.error(f"Error in _handle_manual_connection: {e}")
@@ -319,17 +380,7 @@ class UserHandlers:
                 "⚠️ **Remember:** Only enable futures trading permissions!\n\n"
             )
             
-            keyboard = []
-            for exchange_id, exchange_info in Config.SUPPORTED_EXCHANGES.items():
-                keyboard.append([InlineKeyboardButton(
-                    f"{exchange_info['display_name']} Futures API Guide",
-                    url=exchange_info['guide_url']
-                )])
-            
-            keyboard.append([InlineKeyboardButton("🔙 Back to Connect", callback_data="back_to_connect")])
-            
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            await query.edit_message_text(guides_text, reply_markup=reply_markup, parse_mode='Markdown')
+            await query.edit_message_text(guides_text, reply_markup=self._guides_markup, parse_mode='Markdown')
             
         except Exception as e:
             logger.error(f"Error in _show_exchange_guides: {e}")
@@ -339,13 +390,13 @@ class UserHandlers:
         """Handle /balance command - LIVE MAINNET BALANCES"""
         try:
             user_id = update.effective_user.id
-            db_user = self.user_model.get_user(user_id)
+            db_user = await self._get_user_cached(user_id)
             
             if not db_user:
                 await update.message.reply_text("❌ Please start the bot first with /start")
                 return
             
-            exchanges = self.exchange_model.get_user_exchanges(db_user['id'])
+            exchanges = await self.exchange_model.a_get_user_exchanges(db_user['id'])
             
             if not exchanges:
                 await update.message.reply_text(
@@ -356,54 +407,68 @@ class UserHandlers:
             
             await update.message.reply_text("🔄 Checking LIVE mainnet balances...")
             
+            # Decrypt all credentials off the event loop
+            decrypted = await asyncio.to_thread(self._decrypt_all, exchanges)
+            
+            # Get LIVE balances from every exchange at once
+            balances = iter(await BalanceChecker.get_balances([
+                (exchange['exchange_name'], *credentials)
+                for exchange, credentials in zip(exchanges, decrypted)
+                if not isinstance(credentials, Exception)
+            ]))
+            
             total_balance = 0
-            balance_text = "💰 *YOUR LIVE FUTURES BALANCES* 💰\n\n"
+            parts = ["💰 *YOUR LIVE FUTURES BALANCES* 💰\n\n"]
             
-            for exchange in exchanges:
+            for exchange, credentials in zip(exchanges, decrypted):
                 try:
-                    # Decrypt credentials
-                    api_key, api_secret, passphrase = self.auth_manager.decrypt_credentials(
-                        exchange['api_key_encrypted'],
-                        exchange['api_secret_encrypted'],
-                        exchange['passphrase_encrypted']
-                    )
-                    
-                    # Get LIVE balance
-                    balance = await BalanceChecker.get_balance(
-                        exchange['exchange_name'], api_key, api_secret, passphrase
-                    )
+                    if isinstance(credentials, Exception):
+                        raise credentials
+                    balance = next(balances)
+                    if isinstance(balance, Exception):
+                        raise balance
                     
                     total_balance += balance
-                    exchange_name = Config.SUPPORTED_EXCHANGES[exchange['exchange_name']]['display_name']
+                    exchange_name = exchange_display_name(exchange['exchange_name'])
                     
-                    balance_text += (
-                        f"{exchange_name}\n"
-                        f"💵 Balance: `{balance:,.2f} USDT`\n"
-                        f"🔴 Mode: LIVE MAINNET\n"
-                        f"⚡ Leverage: `{exchange['leverage']}x`\n"
-                        f"📈 Position Size: `{exchange['position_size_percent']}%`\n\n"
-                    )
+                    parts.append(BALANCE_ROW_TEMPLATE.format(
+                        exchange_name=exchange_name,
+                        balance=balance,
+                        leverage=exchange['leverage'],
+                        position_size_percent=exchange['position_size_percent']
+                    ))
                     
                 except Exception as e:
                     logger.error(f"Balance error for {exchange['exchange_name']}: {e}")
-                    exchange_name = Config.SUPPORTED_EXCHANGES[exchange['exchange_name']]['display_name']
-                    balance_text += (
-                        f"{exchange_name}\n"
-                        f"❌ Error: `{str(e)[:50]}...`\n\n"
-                    )
+                    exchange_name = exchange_display_name(exchange['exchange_name'])
+                    parts.append(BALANCE_ERROR_TEMPLATE.format(exchange_name=exchange_name, error=str(e)))
             
-            balance_text += (
+            parts.append(
                 f"💎 **Total Portfolio Value:** `{total_balance:,.2f} USDT`\n\n"
                 f"🔴 **LIVE MAINNET TRADING ACTIVE**\n"
                 f"⚠️ Real money at risk - trade responsibly!"
             )
             
-            await update.message.reply_text(balance_text, parse_mode='Markdown')
+            await update.message.reply_text("".join(parts), parse_mode='Markdown')
             
         except Exception as e:
             logger.error(f"Error in balance_command: {e}")
             await update.message.reply_text("❌ An error occurred. Please try again.")
     
+    def _decrypt_all(self, exchanges):
+        """Decrypt credentials for every exchange, returning the exception in place of a failed entry"""
+        decrypted = []
+        for exchange in exchanges:
+            try:
+                decrypted.append(self.auth_manager.decrypt_credentials(
+                    exchange['api_key_encrypted'],
+                    exchange['api_secret_encrypted'],
+                    exchange['passphrase_encrypted']
+                ))
+            except Exception as e:
+                decrypted.append(e)
+        return decrypted
+    
     async def help_command(self, update: Update, context: CallbackContext):
         """Handle /help command with comprehensive guide"""
         try:
@@ -419,7 +484,7 @@ class UserHandlers:
             )
             
             for exchange_id, exchange_info in Config.SUPPORTED_EXCHANGES.items():
-                help_text += f"• {exchange_info['display_name']}\n"
+                help_text += f"• {exchange_info.display_name}\n"
             
             help_text += (
                 "\n⚠️ **CRITICAL API PERMISSIONS:**\n"
@@ -471,14 +536,14 @@ class UserHandlers:
         """Handle /subscribe command"""
         try:
             user_id = update.effective_user.id
-            db_user = self.user_model.get_user(user_id)
+            db_user = await self._get_user_cached(user_id)
             
             if not db_user:
                 await update.message.reply_text("❌ Please start the bot first with /start")
                 return
             
             # Check if user has connected exchanges
-            exchanges = self.exchange_model.get_user_exchanges(db_user['id'])
+            exchanges = await self.exchange_model.a_get_user_exchanges(db_user['id'])
             if not exchanges:
                 await update.message.reply_text(
                     "⚠️ **Connect an exchange first!**\n\n"
@@ -488,14 +553,7 @@ class UserHandlers:
                 return
             
             # Update subscription status
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                "UPDATE subscriptions SET is_subscribed = 1 WHERE user_id = ?",
-                (db_user['id'],)
-            )
-            conn.commit()
-            conn.close()
+            await asyncio.to_thread(self.db.execute, self._stmt_subscribe, (db_user['id'],))
             
             await update.message.reply_text(
                 "✅ *LIVE TRADING SUBSCRIPTION ACTIVATED!*\n\n"
@@ -513,13 +571,13 @@ class UserHandlers:
         """Handle /trades command"""
         try:
             user_id = update.effective_user.id
-            db_user = self.user_model.get_user(user_id)
+            db_user = await self._get_user_cached(user_id)
             
             if not db_user:
                 await update.message.reply_text("❌ Please start the bot first with /start")
                 return
             
-            trades = self.trade_model.get_user_trades(db_user['id'], limit=10)
+            trades = await self.trade_model.a_get_user_trades(db_user['id'], limit=10)
             
             if not trades:
                 await update.message.reply_text(
@@ -529,24 +587,27 @@ class UserHandlers:
                 )
                 return
             
-            trades_text = "📈 *YOUR LIVE FUTURES TRADES* 📈\n\n"
+            parts = ["📈 *YOUR LIVE FUTURES TRADES* 📈\n\n"]
             
             for i, trade in enumerate(trades, 1):
                 pnl = trade['pnl'] or 0
                 status_emoji = "🟢" if pnl > 0 else "🔴" if pnl < 0 else "🟡"
                 
-                trades_text += (
-                    f"{i}. {status_emoji} **{trade['symbol']}** ({trade['side']})\n"
-                    f"   💰 Entry: `${trade['entry_price']:,.2f}`\n"
-                    f"   📊 Size: `{trade['quantity']:.4f}`\n"
-                    f"   💹 PnL: `{pnl:+.2f} USDT`\n"
-                    f"   🏢 Exchange: {trade['exchange_name'].title()}\n"
-                    f"   📅 {trade['executed_at'][:16]}\n\n"
-                )
-            
-            trades_text += "🔴 **LIVE MAINNET TRADING ACTIVE**"
-            
-            await update.message.reply_text(trades_text, parse_mode='Markdown')
+                parts.append(TRADE_ROW_TEMPLATE.format(
+                    index=i,
+                    status_emoji=status_emoji,
+                    symbol=trade['symbol'],
+                    side=trade['side'],
+                    entry_price=trade['entry_price'],
+                    quantity=trade['quantity'],
+                    pnl=pnl,
+                    exchange_name=trade['exchange_name'].title(),
+                    executed_at=str(trade['executed_at'])
+                ))
+            
+            parts.append("🔴 **LIVE MAINNET TRADING ACTIVE**")
+            
+            await update.message.reply_text("".join(parts), parse_mode='Markdown')
             
         except Exception as e:
             logger.error(f"Error in trades_command: {e}")
@@ -576,28 +637,36 @@ class UserHandlers:
             user_id = update.effective_user.id
             
             # Get selected exchange from context
-            user_data = getattr(context, 'user_data', {})
-            exchange = user_data.get(user_id, {}).get('selected_exchange')
+            exchange = context.user_data.get('selected_exchange')
             
             if not exchange:
                 await update.message.reply_text("❌ Please start with /connect first")
                 return
             
-            credentials = update.message.text.split()
-            exchange_info = Config.SUPPORTED_EXCHANGES[exchange]
-            
+            exchange_info = get_exchange_meta(exchange)
+            needs_passphrase = requires_passphrase(exchange)
+            required_count = 3 if needs_passphrase else 2
+
+            # Bounded split: any extra token lands in one trailing slot and is rejected
+            credentials = update.message.text.split(None, required_count)
+
+            # Remove the raw credentials from the chat as soon as they are parsed
+            try:
+                await update.message.delete()
+            except Exception as e:
+                logger.warning(f"Could not delete credentials message: {e}")
+
             # Validate credential count
-            required_count = 3 if exchange_info['requires_passphrase'] else 2
-            if len(credentials) < required_count:
+            if len(credentials) != required_count:
                 await update.message.reply_text(
                     f"❌ Invalid format. Please provide {required_count} values.\n\n"
-                    f"Expected format: {'API_KEY API_SECRET PASSPHRASE' if exchange_info['requires_passphrase'] else 'API_KEY API_SECRET'}"
+                    f"Expected format: {'API_KEY API_SECRET PASSPHRASE' if needs_passphrase else 'API_KEY API_SECRET'}"
                 )
                 return
-            
+
             api_key = credentials[0]
             api_secret = credentials[1]
-            passphrase = credentials[2] if len(credentials) > 2 else ''
+            passphrase = credentials[2] if needs_passphrase else ''
             
             # Test the connection first
             await update.message.reply_text("🔄 Testing connection to LIVE exchange...")
@@ -606,23 +675,25 @@ class UserHandlers:
                 test_balance = await BalanceChecker.get_balance(exchange, api_key, api_secret, passphrase)
                 
                 # Encrypt credentials
-                encrypted_key, encrypted_secret, encrypted_passphrase = \
-                    self.auth_manager.encrypt_credentials(api_key, api_secret, passphrase)
+                encrypted_credentials = await asyncio.to_thread(
+                    self.auth_manager.encrypt_credentials, api_key, api_secret, passphrase
+                )
                 
                 # Get user ID from database
-                db_user = self.user_model.get_user(user_id)
+                db_user = await self._get_user_cached(user_id)
                 if not db_user:
                     await update.message.reply_text("❌ Please start the bot first with /start")
                     return
                 
                 # Save to database
-                self.exchange_model.add_exchange(
-                    db_user['id'], exchange, encrypted_key, encrypted_secret,
-                    encrypted_passphrase, 'manual'
+                await self.exchange_model.a_add_exchange(
+                    db_user['id'], exchange, encrypted_credentials,
+                    connection_type='manual'
                 )
+                self._invalidate_user(user_id)
                 
                 await update.message.reply_text(
-                    f"✅ *{exchange_info['display_name']} CONNECTED SUCCESSFULLY!*\n\n"
+                    f"✅ *{exchange_info.display_name} CONNECTED SUCCESSFULLY!*\n\n"
                     f"🔴 **LIVE MAINNET CONNECTION**\n"
                     f"💰 Current Balance: `{test_balance:,.2f} USDT`\n\n"
                     f"Your exchange is now connected for live futures trading!\n\n"
@@ -634,20 +705,10 @@ class UserHandlers:
                 )
                 
                 # Clear user data
-                if hasattr(context, 'user_data') and user_id in context.user_data:
-                    context.user_data.pop(user_id, None)
+                context.user_data.pop('selected_exchange', None)
                     
             except Exception as e:
-                await update.message.reply_text(
-                    f"❌ **Connection Failed**\n\n"
-                    f"Error: `{str(e)}`\n\n"
-                    f"Please check:\n"
-                    f"• API keys are correct\n"
-                    f"• Futures trading is enabled\n"
-                    f"• IP restrictions (if any)\n"
-                    f"• Exchange API status\n\n"
-                    f"Try again with correct credentials."
-                )
+                await update.message.reply_text(CONNECTION_FAILED_TEMPLATE % e)
                 
         except Exception as e:
             logger.error(f"Credential handling error: {e}")
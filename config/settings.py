@@ -1,77 +1,178 @@
 import os
-from dotenv import load_dotenv
-from typing import Dict, Any
+import sys
+import json
+import logging
+from types import MappingProxyType
+from functools import lru_cache
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple
 
-# Load environment variables
-load_dotenv()
+# Resolved from the project root, like load_dotenv()'s upward search, so the working directory does not matter
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENV_FILE = os.path.join(_PROJECT_ROOT, '.env')
+CONFIG_CACHE_PATH = os.path.join(_PROJECT_ROOT, 'data', '.config.cache.json')
+
+def _env_file_mtime() -> Optional[float]:
+    """Modification time of the .env file, or None if there is none"""
+    try:
+        return os.path.getmtime(ENV_FILE)
+    except OSError:
+        return None
+
+def _load_config_cache() -> Optional[Dict[str, str]]:
+    """Return the cached .env values if the cache is still current for .env"""
+    if os.environ.get('CONFIG_CACHE') == '0':
+        return None
+    try:
+        with open(CONFIG_CACHE_PATH) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cache.get('env_mtime') != _env_file_mtime():
+        return None
+    return cache.get('values')
+
+# Directories already created by this process
+_ensured_dirs = set()
+
+def _ensure_dir(path: str):
+    """Create a directory once per process; later calls are a set lookup"""
+    if path and path not in _ensured_dirs:
+        os.makedirs(path, exist_ok=True)
+        _ensured_dirs.add(path)
+
+# Load environment variables, from the config cache when it matches .env.
+# Deploys without a .env (systemd, Docker) never touch dotenv.
+_CACHED_DOTENV = None
+_DOTENV_VALUES = {}
+if os.path.exists(ENV_FILE):
+    _CACHED_DOTENV = _load_config_cache()
+    if _CACHED_DOTENV is not None:
+        _DOTENV_VALUES = _CACHED_DOTENV
+    else:
+        from dotenv import dotenv_values
+        # The whole file is cached, not just the keys missing from this run's environment
+        _DOTENV_VALUES = {k: v for k, v in dotenv_values(ENV_FILE).items() if v is not None}
+    for _key, _value in _DOTENV_VALUES.items():
+        # Same precedence as load_dotenv(): real environment wins
+        os.environ.setdefault(_key, _value)
+
+# Snapshot of the environment; Config resolves from this instead of os.getenv
+_ENV = dict(os.environ)
+
+def _envint(key: str, default: int) -> int:
+    """Read an integer setting from the snapshot, naming the key if it is malformed"""
+    value = _ENV.get(key)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{key} must be an integer, got {value!r}")
+
+def _resolve_env() -> Dict[str, Any]:
+    """Resolve and type every env-backed setting in one pass"""
+    return {
+        'BOT_TOKEN': _ENV.get('BOT_TOKEN'),
+        'ADMIN_ID': _envint('ADMIN_ID', 0),
+        'ENCRYPTION_KEY': _ENV.get('ENCRYPTION_KEY', 'your-secret-key-here'),
+        'WEBHOOK_URL': _ENV.get('WEBHOOK_URL', ''),
+        'WEBHOOK_PORT': _envint('WEBHOOK_PORT', 8443),
+        'WEBHOOK_PATH': _ENV.get('WEBHOOK_PATH', '/webhook'),
+        'OAUTH_CALLBACK_URL': _ENV.get('OAUTH_CALLBACK_URL', ''),
+        'DB_PATH': _ENV.get('DB_PATH', 'data/trading_bot.db'),
+        'LOG_LEVEL': _ENV.get('LOG_LEVEL', 'INFO'),
+        'LOG_FILE': _ENV.get('LOG_FILE', 'logs/trading_bot.log'),
+        'BALANCE_CACHE_TTL': _envint('BALANCE_CACHE_TTL', 10),
+    }
+
+_TYPED_ENV = _resolve_env()
+
+@dataclass(slots=True, frozen=True)
+class ExchangeSpec:
+    """Static metadata for a supported exchange"""
+    name: str
+    display_name: str
+    requires_passphrase: bool
+    supports_oauth: bool
+    guide_url: str
+    futures_enabled: bool
+    testnet_url: str
+    mainnet_url: str
+    permissions_required: Tuple[str, ...] = ('Futures Trading', 'Read Account')
 
 class Config:
     # Bot configuration
-    BOT_TOKEN = os.getenv('BOT_TOKEN')
-    ADMIN_ID = int(os.getenv('ADMIN_ID', 0))
-    ENCRYPTION_KEY = os.getenv('ENCRYPTION_KEY', 'your-secret-key-here')
+    BOT_TOKEN = _TYPED_ENV['BOT_TOKEN']
+    ADMIN_ID = _TYPED_ENV['ADMIN_ID']
+    ENCRYPTION_KEY = _TYPED_ENV['ENCRYPTION_KEY']
     
     # Webhook configuration (optional)
-    WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')
-    WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 8443))
-    WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')
+    WEBHOOK_URL = _TYPED_ENV['WEBHOOK_URL']
+    WEBHOOK_PORT = _TYPED_ENV['WEBHOOK_PORT']
+    WEBHOOK_PATH = _TYPED_ENV['WEBHOOK_PATH']
     
     # OAuth configuration (optional)
-    OAUTH_CALLBACK_URL = os.getenv('OAUTH_CALLBACK_URL', '')
+    OAUTH_CALLBACK_URL = _TYPED_ENV['OAUTH_CALLBACK_URL']
     
-    # Supported exchanges with their configurations
-    SUPPORTED_EXCHANGES = {
-        'binance': {
-            'name': 'Binance',
-            'display_name': 'Binance',
-            'requires_passphrase': False,
-            'supports_oauth': False,
-            'guide_url': 'https://www.binance.com/en/support/faq/how-to-create-api-keys-360002502072',
-            'futures_enabled': True,
-            'testnet_url': 'https://testnet.binancefuture.com',
-            'mainnet_url': 'https://fapi.binance.com'
-        },
-        'bybit': {
-            'name': 'Bybit',
-            'display_name': 'Bybit',
-            'requires_passphrase': False,
-            'supports_oauth': False,
-            'guide_url': 'https://learn.bybit.com/bybit-guide/bybit-api-key/',
-            'futures_enabled': True,
-            'testnet_url': 'https://api-testnet.bybit.com',
-            'mainnet_url': 'https://api.bybit.com'
-        },
-        'okx': {
-            'name': 'OKX',
-            'display_name': 'OKX',
-            'requires_passphrase': True,
-            'supports_oauth': False,
-            'guide_url': 'https://www.okx.com/help-center/api-key',
-            'futures_enabled': True,
-            'testnet_url': 'https://www.okx.com/api/v5/mock',
-            'mainnet_url': 'https://www.okx.com/api/v5'
-        },
-        'bitget': {
-            'name': 'Bitget',
-            'display_name': 'Bitget',
-            'requires_passphrase': False,
-            'supports_oauth': False,
-            'guide_url': 'https://bitget.zendesk.com/hc/en-us/articles/900006092183-API-Management',
-            'futures_enabled': True,
-            'testnet_url': 'https://api-demo.bitget.com',
-            'mainnet_url': 'https://api.bitget.com'
-        },
-        'mexc': {
-            'name': 'MEXC',
-            'display_name': 'MEXC',
-            'requires_passphrase': False,
-            'supports_oauth': False,
-            'guide_url': 'https://mexc.zendesk.com/hc/en-001/articles/360037600751-How-to-Create-an-API',
-            'futures_enabled': True,
-            'testnet_url': 'https://contract.mexc.com/api',
-            'mainnet_url': 'https://contract.mexc.com/api'
-        }
-    }
+    # Supported exchanges with their configurations (read-only, interned keys)
+    SUPPORTED_EXCHANGES = MappingProxyType({sys.intern(k): v for k, v in {
+        'binance': ExchangeSpec(
+            name='Binance',
+            display_name='Binance',
+            requires_passphrase=False,
+            supports_oauth=False,
+            guide_url='https://www.binance.com/en/support/faq/how-to-create-api-keys-360002502072',
+            futures_enabled=True,
+            testnet_url='https://testnet.binancefuture.com',
+            mainnet_url='https://fapi.binance.com'
+        ),
+        'bybit': ExchangeSpec(
+            name='Bybit',
+            display_name='Bybit',
+            requires_passphrase=False,
+            supports_oauth=False,
+            guide_url='https://learn.bybit.com/bybit-guide/bybit-api-key/',
+            futures_enabled=True,
+            testnet_url='https://api-testnet.bybit.com',
+            mainnet_url='https://api.bybit.com'
+        ),
+        'okx': ExchangeSpec(
+            name='OKX',
+            display_name='OKX',
+            requires_passphrase=True,
+            supports_oauth=False,
+            guide_url='https://www.okx.com/help-center/api-key',
+            futures_enabled=True,
+            testnet_url='https://www.okx.com/api/v5/mock',
+            mainnet_url='https://www.okx.com/api/v5'
+        ),
+        'bitget': ExchangeSpec(
+            name='Bitget',
+            display_name='Bitget',
+            requires_passphrase=False,
+            supports_oauth=False,
+            guide_url='https://bitget.zendesk.com/hc/en-us/articles/900006092183-API-Management',
+            futures_enabled=True,
+            testnet_url='https://api-demo.bitget.com',
+            mainnet_url='https://api.bitget.com'
+        ),
+        'mexc': ExchangeSpec(
+            name='MEXC',
+            display_name='MEXC',
+            requires_passphrase=False,
+            supports_oauth=False,
+            guide_url='https://mexc.zendesk.com/hc/en-001/articles/360037600751-How-to-Create-an-API',
+            futures_enabled=True,
+            testnet_url='https://contract.mexc.com/api',
+            mainnet_url='https://contract.mexc.com/api'
+        )
+    }.items()})
+    
+    # Derived lookups for the handlers
+    PASSPHRASE_EXCHANGES = frozenset(k for k, v in SUPPORTED_EXCHANGES.items() if v.requires_passphrase)
+    FUTURES_EXCHANGES = frozenset(k for k, v in SUPPORTED_EXCHANGES.items() if v.futures_enabled)
+    MAINNET_URLS = MappingProxyType({k: v.mainnet_url for k, v in SUPPORTED_EXCHANGES.items()})
     
     # Trading configuration
     DEFAULT_LEVERAGE = 10
@@ -82,12 +183,18 @@ class Config:
     USE_TAKE_PROFIT = True
     
     # Database configuration
-    DB_PATH = os.getenv('DB_PATH', 'data/trading_bot.db')
+    DB_PATH = _TYPED_ENV['DB_PATH']
+    _DB_DIR = os.path.dirname(DB_PATH)
     
     # Logging configuration
-    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_LEVEL = _TYPED_ENV['LOG_LEVEL']
     LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    LOG_FILE = os.getenv('LOG_FILE', 'logs/trading_bot.log')
+    LOG_FORMATTER = logging.Formatter(LOG_FORMAT)
+    LOG_FILE = _TYPED_ENV['LOG_FILE']
+    _LOG_DIR = os.path.dirname(LOG_FILE)
+    
+    # Seconds a fetched exchange balance is reused before querying the exchange again
+    BALANCE_CACHE_TTL = _TYPED_ENV['BALANCE_CACHE_TTL']
     
     # Signal configuration
     SIGNAL_EXPIRY_HOURS = 24
@@ -95,17 +202,71 @@ class Config:
     # Notification settings
     NOTIFY_ON_TRADE = True
     NOTIFY_ON_ERROR = True
+    
+    _validated = False
+
+    @classmethod
+    def refresh(cls):
+        """Re-snapshot the environment and re-resolve env-backed settings"""
+        global _ENV, _TYPED_ENV
+        _ENV = dict(os.environ)
+        _TYPED_ENV = _resolve_env()
+        for key, value in _TYPED_ENV.items():
+            setattr(cls, key, value)
+        cls._DB_DIR = os.path.dirname(cls.DB_PATH)
+        cls._LOG_DIR = os.path.dirname(cls.LOG_FILE)
+        cls._validated = False
 
     @classmethod
     def validate(cls):
         """Validate required configuration"""
+        if cls._validated:
+            return True
         if not cls.BOT_TOKEN:
             raise ValueError("BOT_TOKEN is required in .env file")
         if not cls.ADMIN_ID:
             raise ValueError("ADMIN_ID is required in .env file")
         
         # Create required directories
-        os.makedirs(os.path.dirname(cls.DB_PATH), exist_ok=True)
-        os.makedirs(os.path.dirname(cls.LOG_FILE), exist_ok=True)
+        _ensure_dir(cls._DB_DIR)
+        _ensure_dir(cls._LOG_DIR)
         
+        cls.write_cache()
+        cls._validated = True
         return True
+
+    @classmethod
+    def write_cache(cls):
+        """Save the values loaded from .env so the next start can skip parsing it"""
+        env_mtime = _env_file_mtime()
+        if env_mtime is None or _CACHED_DOTENV is not None or not _DOTENV_VALUES or _ENV.get('CONFIG_CACHE') == '0':
+            return
+        try:
+            _ensure_dir(os.path.dirname(CONFIG_CACHE_PATH))
+            # The cache holds secrets from .env, keep it owner-only
+            fd = os.open(CONFIG_CACHE_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'env_mtime': env_mtime, 'values': _DOTENV_VALUES}, f)
+        except OSError:
+            pass
+
+
+@lru_cache(maxsize=None)
+def get_exchange_meta(name: str) -> ExchangeSpec:
+    """Configuration entry for a supported exchange"""
+    return Config.SUPPORTED_EXCHANGES[name]
+
+@lru_cache(maxsize=None)
+def requires_passphrase(name: str) -> bool:
+    """Whether the exchange needs a passphrase alongside key and secret"""
+    return get_exchange_meta(name).requires_passphrase
+
+@lru_cache(maxsize=None)
+def exchange_display_name(name: str) -> str:
+    """Human readable exchange name"""
+    return get_exchange_meta(name).display_name
+
+@lru_cache(maxsize=None)
+def exchange_mainnet_url(name: str) -> str:
+    """Mainnet REST base URL for the exchange"""
+    return get_exchange_meta(name).mainnet_url
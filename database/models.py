@@ -1,152 +1,393 @@
+import asyncio
 import sqlite3
 import os
-from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Tuple
 import json
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
 import sqlitecloud
 
+logger = logging.getLogger(__name__)
+
+# Maximum number of pooled sqlitecloud read connections per Database; writes use one dedicated connection
+POOL_SIZE = 8
+
+# Applied to every new connection; WAL plus synchronous=NORMAL avoids an fsync per commit
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+)
+
+# Minimum seconds between PRAGMA optimize runs as connections go back to the pool
+OPTIMIZE_INTERVAL = 3600
+
+# Hot statements, defined once so every call binds against the same SQL text
+SQL_GET_USER = '''
+    SELECT id, telegram_id, username, first_name, last_name, 
+           is_premium, created_at, last_active
+    FROM users WHERE telegram_id = ?
+'''
+SQL_INSERT_TRADE_EXECUTION = '''
+    INSERT INTO trade_executions 
+    (signal_id, user_id, exchange_name, symbol, side, quantity, 
+     entry_price, order_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    RETURNING id
+'''
+SQL_UPDATE_TRADE_PNL = '''
+    UPDATE trade_executions 
+    SET pnl = ?, current_price = ?
+    WHERE id = ?
+'''
+
+SQL_UPSERT_DAILY_PNL = '''
+    INSERT INTO daily_pnl (user_id, date, pnl, trades_count)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(user_id, date) DO UPDATE SET
+        pnl = pnl + excluded.pnl,
+        trades_count = trades_count + excluded.trades_count
+'''
+
+# Built once instead of per json.dumps() call; compact output and no cycle check for plain result dicts
+_dumps = json.JSONEncoder(separators=(',', ':'), check_circular=False).encode
+
+# Rows per multi-VALUES INSERT; keeps 8-column rows under SQLite's 999 bound-parameter limit
+BULK_INSERT_ROWS = 100
+
+# Rows pulled per round trip when streaming large result sets
+ITER_BATCH_SIZE = 200
+
+# Subscriber lists, shared by every Database in the process: key -> (expires_at, rows)
+SUBSCRIBER_CACHE_TTL = 30
+_subscriber_cache = {}
+_subscriber_cache_lock = threading.RLock()
+
+def _cached_subscribers(key: str, loader) -> List[Dict]:
+    """Return a cached subscriber list, reloading it once the TTL has passed"""
+    with _subscriber_cache_lock:
+        cached = _subscriber_cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            return list(cached[1])
+        rows = loader()
+        _subscriber_cache[key] = (time.monotonic() + SUBSCRIBER_CACHE_TTL, rows)
+        return list(rows)
+
+def _invalidate_subscribers():
+    """Drop cached subscriber lists after a write that can change membership"""
+    with _subscriber_cache_lock:
+        _subscriber_cache.clear()
+
+# Serializes writes issued from async code so they queue here instead of contending for SQLite's writer
+_async_write_lock = asyncio.Lock()
+
+async def _run_write(func, *args, **kwargs):
+    """Run a blocking write in a worker thread, one async writer at a time"""
+    async with _async_write_lock:
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+def _utc_timestamp(offset_seconds: float = 0) -> str:
+    """UTC 'YYYY-MM-DD HH:MM:SS', the same text form SQLite's CURRENT_TIMESTAMP compares against"""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(time.time() + offset_seconds))
+
+def _fetch_dicts(cursor) -> List[Dict]:
+    """Map the remaining result rows to dicts keyed by column name"""
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+def _iter_dicts(cursor):
+    """Yield result rows as dicts, fetching ITER_BATCH_SIZE rows at a time"""
+    columns = [column[0] for column in cursor.description]
+    while True:
+        rows = cursor.fetchmany(ITER_BATCH_SIZE)
+        if not rows:
+            return
+        for row in rows:
+            yield dict(zip(columns, row))
+
+def _fetch_dict(cursor) -> Optional[Dict]:
+    """Map the next result row to a dict keyed by column name, or None"""
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return dict(zip([column[0] for column in cursor.description], row))
+
+def _insert_rows(cursor, insert_sql: str, rows: List[tuple]):
+    """Insert rows with one multi-VALUES statement per BULK_INSERT_ROWS chunk"""
+    placeholders = '(' + ', '.join('?' * len(rows[0])) + ')'
+    for start in range(0, len(rows), BULK_INSERT_ROWS):
+        chunk = rows[start:start + BULK_INSERT_ROWS]
+        cursor.execute(
+            insert_sql + ', '.join([placeholders] * len(chunk)),
+            [value for row in chunk for value in row]
+        )
+
 class Database:
-    def __init__(self):
+    # SQLite has a single writer; every instance in the process queues here instead of hitting SQLITE_BUSY
+    _write_lock = threading.Lock()
+    
+    def __init__(self, pool_size: int = POOL_SIZE):
+        self._pool = queue.Queue(maxsize=pool_size)
+        self._pool_size = pool_size
+        self._opened = 0
+        self._pool_lock = threading.Lock()
+        self._writer = None
+        self._next_optimize = time.monotonic() + OPTIMIZE_INTERVAL
         self.init_database()
     
     def get_connection(self):
-        return sqlitecloud.connect(os.getenv("SQLITE_CLOUD"))
+        conn = sqlitecloud.connect(os.getenv("SQLITE_CLOUD"))
+        try:
+            for pragma in CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+        except Exception as e:
+            # The sqlitecloud server may manage these itself
+            logger.warning(f"Could not apply connection PRAGMAs: {e}")
+        return conn
+    
+    def _acquire(self):
+        """Take an idle pooled connection, opening a new one while under the pool size"""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._pool_lock:
+            if self._opened < self._pool_size:
+                self._opened += 1
+                try:
+                    return self.get_connection()
+                except Exception:
+                    self._opened -= 1
+                    raise
+        return self._pool.get()
+    
+    def _release(self, conn):
+        """Put a healthy connection back, refreshing planner statistics once per OPTIMIZE_INTERVAL"""
+        now = time.monotonic()
+        if now >= self._next_optimize:
+            self._next_optimize = now + OPTIMIZE_INTERVAL
+            try:
+                conn.execute("PRAGMA optimize")
+            except Exception as e:
+                logger.warning(f"PRAGMA optimize failed: {e}")
+        self._pool.put(conn)
+    
+    def _discard(self, conn):
+        """Drop a broken connection so the pool can open a fresh one"""
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._pool_lock:
+            self._opened -= 1
+    
+    @contextmanager
+    def reader(self):
+        """Borrow a pooled read connection for the duration of the block"""
+        conn = self._acquire()
+        healthy = True
+        try:
+            yield conn
+        except Exception:
+            # A connection that cannot even roll back is dead; don't hand it out again
+            try:
+                conn.rollback()
+            except Exception as e:
+                logger.warning(f"Discarding broken database connection: {e}")
+                healthy = False
+            raise
+        finally:
+            # Also runs on GeneratorExit, so iter_* generators abandoned early still give the connection back
+            if healthy:
+                self._release(conn)
+            else:
+                self._discard(conn)
+    
+    @contextmanager
+    def writer(self):
+        """Lend the dedicated writer connection, holding the process-wide write lock"""
+        with self._write_lock:
+            conn = self._get_writer()
+            try:
+                yield conn
+            except Exception:
+                try:
+                    conn.rollback()
+                except Exception as e:
+                    logger.warning(f"Reopening broken writer connection: {e}")
+                    self._close_writer()
+                raise
+    
+    def _get_writer(self):
+        """Return the long-lived writer connection, opening it on first use"""
+        if self._writer is None:
+            self._writer = self.get_connection()
+        return self._writer
+    
+    def _close_writer(self):
+        """Drop the writer connection so the next write opens a fresh one"""
+        try:
+            self._writer.close()
+        except Exception:
+            pass
+        self._writer = None
+    
+    def execute(self, sql: str, params: tuple = ()):
+        """Run a single write statement on the writer connection and commit"""
+        with self.writer() as conn:
+            conn.execute(sql, params)
+            conn.commit()
+        _invalidate_subscribers()
     
     def init_database(self):
         """Initialize all database tables"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Users table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY,
-                telegram_id INTEGER UNIQUE NOT NULL,
-                username TEXT,
-                first_name TEXT,
-                last_name TEXT,
-                is_premium BOOLEAN DEFAULT 0,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                last_active DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Exchange connections table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS exchanges (
-                id INTEGER PRIMARY KEY,
-                user_id INTEGER NOT NULL,
-                exchange_name TEXT NOT NULL,
-                api_key_encrypted BLOB NOT NULL,
-                api_secret_encrypted BLOB NOT NULL,
-                passphrase_encrypted BLOB,
-                connection_type TEXT DEFAULT 'manual',
-                is_active BOOLEAN DEFAULT 1,
-                auto_trade BOOLEAN DEFAULT 1,
-                leverage INTEGER DEFAULT 10,
-                position_size_percent REAL DEFAULT 5.0,
-                balance REAL DEFAULT 0,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                last_used DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )
-        ''')
-        
-        # Subscriptions table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS subscriptions (
-                id INTEGER PRIMARY KEY,
-                user_id INTEGER NOT NULL,
-                is_subscribed BOOLEAN DEFAULT 1,
-                auto_trade BOOLEAN DEFAULT 1,
-                max_position_size REAL DEFAULT 5.0,
-                use_stop_loss BOOLEAN DEFAULT 1,
-                use_take_profit BOOLEAN DEFAULT 1,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )
-        ''')
-        
-        # Trading signals table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS signals (
-                id INTEGER PRIMARY KEY,
-                symbol TEXT NOT NULL,
-                signal_type TEXT NOT NULL,
-                entry_price REAL NOT NULL,
-                stop_loss REAL,
-                take_profit REAL,
-                leverage INTEGER DEFAULT 10,
-                position_size_percent REAL DEFAULT 5.0,
-                status TEXT DEFAULT 'active',
-                is_processed BOOLEAN DEFAULT 0,
-                expires_at DATETIME,
-                created_by INTEGER NOT NULL,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                closed_at DATETIME,
-                execution_results TEXT
-            )
-        ''')
-        
-        # Trade executions table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS trade_executions (
-                id INTEGER PRIMARY KEY,
-                signal_id INTEGER NOT NULL,
-                user_id INTEGER NOT NULL,
-                exchange_name TEXT NOT NULL,
-                symbol TEXT NOT NULL,
-                side TEXT NOT NULL,
-                quantity REAL NOT NULL,
-                entry_price REAL NOT NULL,
-                current_price REAL,
-                pnl REAL DEFAULT 0,
-                status TEXT DEFAULT 'open',
-                order_id TEXT,
-                executed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                closed_at DATETIME,
-                FOREIGN KEY(signal_id) REFERENCES signals(id),
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )
-        ''')
-        
-        # Portfolio tracking table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS portfolios (
-                id INTEGER PRIMARY KEY,
-                user_id INTEGER NOT NULL,
-                total_balance REAL DEFAULT 0,
-                total_pnl REAL DEFAULT 0,
-                pnl_percentage REAL DEFAULT 0,
-                total_trades INTEGER DEFAULT 0,
-                winning_trades INTEGER DEFAULT 0,
-                losing_trades INTEGER DEFAULT 0,
-                win_rate REAL DEFAULT 0,
-                best_trade REAL DEFAULT 0,
-                worst_trade REAL DEFAULT 0,
-                average_trade REAL DEFAULT 0,
-                first_trade_date DATETIME,
-                last_updated DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )
-        ''')
-        
-        # Daily P&L tracking
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS daily_pnl (
-                id INTEGER PRIMARY KEY,
-                user_id INTEGER NOT NULL,
-                date DATE NOT NULL,
-                pnl REAL DEFAULT 0,
-                trades_count INTEGER DEFAULT 0,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(user_id) REFERENCES users(id),
-                UNIQUE(user_id, date)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        with self.writer() as conn:
+            cursor = conn.cursor()
+            
+            # Users table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY,
+                    telegram_id INTEGER UNIQUE NOT NULL,
+                    username TEXT,
+                    first_name TEXT,
+                    last_name TEXT,
+                    is_premium BOOLEAN DEFAULT 0,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    last_active DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Exchange connections table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS exchanges (
+                    id INTEGER PRIMARY KEY,
+                    user_id INTEGER NOT NULL,
+                    exchange_name TEXT NOT NULL,
+                    api_key_encrypted BLOB NOT NULL,
+                    api_secret_encrypted BLOB NOT NULL,
+                    passphrase_encrypted BLOB,
+                    connection_type TEXT DEFAULT 'manual',
+                    is_active BOOLEAN DEFAULT 1,
+                    auto_trade BOOLEAN DEFAULT 1,
+                    leverage INTEGER DEFAULT 10,
+                    position_size_percent REAL DEFAULT 5.0,
+                    balance REAL DEFAULT 0,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    last_used DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY(user_id) REFERENCES users(id)
+                )
+            ''')
+            
+            # Subscriptions table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS subscriptions (
+                    id INTEGER PRIMARY KEY,
+                    user_id INTEGER NOT NULL,
+                    is_subscribed BOOLEAN DEFAULT 1,
+                    auto_trade BOOLEAN DEFAULT 1,
+                    max_position_size REAL DEFAULT 5.0,
+                    use_stop_loss BOOLEAN DEFAULT 1,
+                    use_take_profit BOOLEAN DEFAULT 1,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY(user_id) REFERENCES users(id)
+                )
+            ''')
+            
+            # Trading signals table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS signals (
+                    id INTEGER PRIMARY KEY,
+                    symbol TEXT NOT NULL,
+                    signal_type TEXT NOT NULL,
+                    entry_price REAL NOT NULL,
+                    stop_loss REAL,
+                    take_profit REAL,
+                    leverage INTEGER DEFAULT 10,
+                    position_size_percent REAL DEFAULT 5.0,
+                    status TEXT DEFAULT 'active',
+                    is_processed BOOLEAN DEFAULT 0,
+                    expires_at DATETIME,
+                    created_by INTEGER NOT NULL,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    closed_at DATETIME,
+                    execution_results TEXT
+                )
+            ''')
+            
+            # Trade executions table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS trade_executions (
+                    id INTEGER PRIMARY KEY,
+                    signal_id INTEGER NOT NULL,
+                    user_id INTEGER NOT NULL,
+                    exchange_name TEXT NOT NULL,
+                    symbol TEXT NOT NULL,
+                    side TEXT NOT NULL,
+                    quantity REAL NOT NULL,
+                    entry_price REAL NOT NULL,
+                    current_price REAL,
+                    pnl REAL DEFAULT 0,
+                    status TEXT DEFAULT 'open',
+                    order_id TEXT,
+                    executed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    closed_at DATETIME,
+                    FOREIGN KEY(signal_id) REFERENCES signals(id),
+                    FOREIGN KEY(user_id) REFERENCES users(id)
+                )
+            ''')
+            
+            # Portfolio tracking table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS portfolios (
+                    id INTEGER PRIMARY KEY,
+                    user_id INTEGER NOT NULL,
+                    total_balance REAL DEFAULT 0,
+                    total_pnl REAL DEFAULT 0,
+                    pnl_percentage REAL DEFAULT 0,
+                    total_trades INTEGER DEFAULT 0,
+                    winning_trades INTEGER DEFAULT 0,
+                    losing_trades INTEGER DEFAULT 0,
+                    win_rate REAL DEFAULT 0,
+                    best_trade REAL DEFAULT 0,
+                    worst_trade REAL DEFAULT 0,
+                    average_trade REAL DEFAULT 0,
+                    first_trade_date DATETIME,
+                    last_updated DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY(user_id) REFERENCES users(id)
+                )
+            ''')
+            
+            # Daily P&L tracking
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS daily_pnl (
+                    id INTEGER PRIMARY KEY,
+                    user_id INTEGER NOT NULL,
+                    date DATE NOT NULL,
+                    pnl REAL DEFAULT 0,
+                    trades_count INTEGER DEFAULT 0,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY(user_id) REFERENCES users(id),
+                    UNIQUE(user_id, date)
+                )
+            ''')
+            
+            # Indexes for the hot lookup predicates (daily_pnl is covered by its UNIQUE key)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_exchanges_user_active ON exchanges(user_id, is_active)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_subs_user ON subscriptions(user_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_signals_pending ON signals(is_processed, status, expires_at)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_trades_user_status ON trade_executions(user_id, status)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_trades_status ON trade_executions(status)")
+            
+            # Give the planner real row counts for the new indexes
+            cursor.execute("ANALYZE")
+            
+            conn.commit()
 
 class UserModel:
     def __init__(self, db: Database):
@@ -155,278 +396,247 @@ class UserModel:
     def create_user(self, telegram_id: int, username: str = None, 
                    first_name: str = None, last_name: str = None) -> int:
         """Create new user and return user ID"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute('''
-                INSERT INTO users (telegram_id, username, first_name, last_name) 
-                VALUES (?, ?, ?, ?)
-            ''', (telegram_id, username, first_name, last_name))
-            user_id = cursor.lastrowid
+        with self.db.writer() as conn:
+            cursor = conn.cursor()
             
-            # Create default subscription
-            cursor.execute('''
-                INSERT INTO subscriptions (user_id) VALUES (?)
-            ''', (user_id,))
-            
-            # Create portfolio record
-            cursor.execute('''
-                INSERT INTO portfolios (user_id) VALUES (?)
-            ''', (user_id,))
-            
-            conn.commit()
-            return user_id
-        except sqlite3.IntegrityError:
-            # User already exists, update last active
-            cursor.execute('''
-                UPDATE users SET last_active = CURRENT_TIMESTAMP 
-                WHERE telegram_id = ?
-            ''', (telegram_id,))
-            cursor.execute("SELECT id FROM users WHERE telegram_id = ?", (telegram_id,))
-            conn.commit()
-            return cursor.fetchone()[0]
-        finally:
-            conn.close()
+            # All three inserts (or the last_active touch) commit as one transaction
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                try:
+                    cursor.execute('''
+                        INSERT INTO users (telegram_id, username, first_name, last_name) 
+                        VALUES (?, ?, ?, ?)
+                        RETURNING id
+                    ''', (telegram_id, username, first_name, last_name))
+                    user_id = cursor.fetchone()[0]
+                    
+                    # Create default subscription
+                    cursor.execute('''
+                        INSERT INTO subscriptions (user_id) VALUES (?)
+                    ''', (user_id,))
+                    
+                    # Create portfolio record
+                    cursor.execute('''
+                        INSERT INTO portfolios (user_id) VALUES (?)
+                    ''', (user_id,))
+                except sqlite3.IntegrityError:
+                    # User already exists, update last active
+                    cursor.execute('''
+                        UPDATE users SET last_active = CURRENT_TIMESTAMP 
+                        WHERE telegram_id = ?
+                        RETURNING id
+                    ''', (telegram_id,))
+                    user_id = cursor.fetchone()[0]
+                
+                conn.commit()
+                _invalidate_subscribers()
+                return user_id
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
     
     def get_user(self, telegram_id: int) -> Optional[Dict]:
         """Get user by telegram ID"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, telegram_id, username, first_name, last_name, 
-                   is_premium, created_at, last_active
-            FROM users WHERE telegram_id = ?
-        ''', (telegram_id,))
-        
-        row = cursor.fetchone()
-        conn.close()
-        
-        if row:
-            return {
-                'id': row[0], 'telegram_id': row[1], 'username': row[2],
-                'first_name': row[3], 'last_name': row[4], 'is_premium': row[5],
-                'created_at': row[6], 'last_active': row[7]
-            }
-        return None
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(SQL_GET_USER, (telegram_id,))
+            
+            row = _fetch_dict(cursor)
+        return row
+    
+    def iter_all_users(self) -> Iterator[Dict]:
+        """Yield all users, newest first; the pooled connection is held until iteration ends"""
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.arraysize = ITER_BATCH_SIZE
+            
+            cursor.execute('''
+                SELECT id, telegram_id, username, first_name, last_name, 
+                       is_premium, created_at, last_active
+                FROM users ORDER BY created_at DESC
+            ''')
+            
+            yield from _iter_dicts(cursor)
     
     def get_all_users(self) -> List[Dict]:
         """Get all users"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, telegram_id, username, first_name, last_name, 
-                   is_premium, created_at, last_active
-            FROM users ORDER BY created_at DESC
-        ''')
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        users = []
-        for row in rows:
-            users.append({
-                'id': row[0], 'telegram_id': row[1], 'username': row[2],
-                'first_name': row[3], 'last_name': row[4], 'is_premium': row[5],
-                'created_at': row[6], 'last_active': row[7]
-            })
-        return users
+        return list(self.iter_all_users())
     
     def get_all_users_count(self) -> int:
         """Get total number of users"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM users")
-        count = cursor.fetchone()[0]
-        conn.close()
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM users")
+            count = cursor.fetchone()[0]
         return count
     
     def get_active_users_count(self, days: int = 7) -> int:
         """Get count of users active in last N days"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cutoff_date = datetime.now() - timedelta(days=days)
-        cursor.execute('''
-            SELECT COUNT(*) FROM users 
-            WHERE last_active >= ?
-        ''', (cutoff_date,))
-        count = cursor.fetchone()[0]
-        conn.close()
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT COUNT(*) FROM users 
+                WHERE last_active >= datetime('now', ?)
+            ''', (f'-{days} days',))
+            count = cursor.fetchone()[0]
         return count
     
     def get_subscription(self, user_id: int) -> Optional[Dict]:
         """Get user subscription details"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT is_subscribed, auto_trade, max_position_size, 
-                   use_stop_loss, use_take_profit
-            FROM subscriptions WHERE user_id = ?
-        ''', (user_id,))
-        
-        row = cursor.fetchone()
-        conn.close()
-        
-        if row:
-            return {
-                'is_subscribed': row[0], 'auto_trade': row[1], 
-                'max_position_size': row[2], 'use_stop_loss': row[3], 
-                'use_take_profit': row[4]
-            }
-        return None
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT is_subscribed, auto_trade, max_position_size, 
+                       use_stop_loss, use_take_profit
+                FROM subscriptions WHERE user_id = ?
+            ''', (user_id,))
+            
+            row = _fetch_dict(cursor)
+        return row
     
     def update_subscription(self, user_id: int, is_subscribed: bool, auto_trade: bool):
         """Update user subscription"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE subscriptions 
-            SET is_subscribed = ?, auto_trade = ?
-            WHERE user_id = ?
-        ''', (is_subscribed, auto_trade, user_id))
-        
-        conn.commit()
-        conn.close()
+        with self.db.writer() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                UPDATE subscriptions 
+                SET is_subscribed = ?, auto_trade = ?
+                WHERE user_id = ?
+            ''', (is_subscribed, auto_trade, user_id))
+            
+            conn.commit()
+        _invalidate_subscribers()
 
     def get_subscribed_users(self) -> List[Dict]:
         """Get all subscribed users with exchanges"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT DISTINCT u.id, u.telegram_id, u.username, u.first_name,
-               s.auto_trade, s.max_position_size
-        FROM users u
-        JOIN subscriptions s ON u.id = s.user_id
-        JOIN exchanges e ON u.id = e.user_id
-        WHERE s.is_subscribed = 1 AND e.is_active = 1
-        ''')
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        users = []
-        for row in rows:
-            users.append({
-                'id': row[0], 'telegram_id': row[1], 'username': row[2],
-                'first_name': row[3], 'auto_trade': row[4], 'max_position_size': row[5]
-            })
+        return _cached_subscribers('subscribed_users', self._fetch_subscribed_users)
+    
+    def _fetch_subscribed_users(self) -> List[Dict]:
+        """Query subscribed users with exchanges"""
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT u.id, u.telegram_id, u.username, u.first_name,
+                   s.auto_trade, s.max_position_size
+            FROM users u
+            JOIN subscriptions s ON u.id = s.user_id
+            WHERE s.is_subscribed = 1
+              AND EXISTS (SELECT 1 FROM exchanges e WHERE e.user_id = u.id AND e.is_active = 1)
+            ''')
+            
+            users = _fetch_dicts(cursor)
         return users
 
+    async def a_get_subscribed_users(self) -> List[Dict]:
+        """get_subscribed_users without blocking the event loop"""
+        return await asyncio.to_thread(self.get_subscribed_users)
+    
+    async def a_create_user(self, *args, **kwargs) -> int:
+        """create_user without blocking the event loop"""
+        return await _run_write(self.create_user, *args, **kwargs)
+
 class ExchangeModel:
     def __init__(self, db: Database):
         self.db = db
     
     def add_exchange(self, user_id: int, exchange_name: str, 
-                    api_key_encrypted: bytes, api_secret_encrypted: bytes,
+                    api_key_encrypted: bytes, api_secret_encrypted: bytes = b'',
                     passphrase_encrypted: bytes = b'', connection_type: str = 'manual',
                     leverage: int = 10) -> int:
-        """Add exchange connection"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO exchanges 
-            (user_id, exchange_name, api_key_encrypted, api_secret_encrypted, 
-             passphrase_encrypted, connection_type, leverage) 
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (user_id, exchange_name, api_key_encrypted, api_secret_encrypted,
-              passphrase_encrypted, connection_type, leverage))
+        """Add exchange connection
         
-        exchange_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        Credentials from ExchangeAuthManager.encrypt_credentials arrive as one payload in
+        api_key_encrypted, with the secret and passphrase columns left empty.
+        """
+        with self.db.writer() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT INTO exchanges 
+                (user_id, exchange_name, api_key_encrypted, api_secret_encrypted, 
+                 passphrase_encrypted, connection_type, leverage) 
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                RETURNING id
+            ''', (user_id, exchange_name, api_key_encrypted, api_secret_encrypted,
+                  passphrase_encrypted, connection_type, leverage))
+            
+            exchange_id = cursor.fetchone()[0]
+            conn.commit()
+        _invalidate_subscribers()
         return exchange_id
     
     def get_user_exchanges(self, user_id: int) -> List[Dict]:
         """Get all active exchanges for a user"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, exchange_name, api_key_encrypted, api_secret_encrypted,
-                   passphrase_encrypted, connection_type, is_active, auto_trade,
-                   leverage, position_size_percent, balance, created_at, last_used
-            FROM exchanges 
-            WHERE user_id = ? AND is_active = 1
-        ''', (user_id,))
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        exchanges = []
-        for row in rows:
-            exchanges.append({
-                'id': row[0], 'exchange_name': row[1], 'api_key_encrypted': row[2],
-                'api_secret_encrypted': row[3], 'passphrase_encrypted': row[4],
-                'connection_type': row[5], 'is_active': row[6], 'auto_trade': row[7],
-                'leverage': row[8], 'position_size_percent': row[9], 'balance': row[10],
-                'created_at': row[11], 'last_used': row[12]
-            })
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT id, exchange_name, api_key_encrypted, api_secret_encrypted,
+                       passphrase_encrypted, connection_type, is_active, auto_trade,
+                       leverage, position_size_percent, balance, created_at, last_used
+                FROM exchanges 
+                WHERE user_id = ? AND is_active = 1
+            ''', (user_id,))
+            
+            exchanges = _fetch_dicts(cursor)
         return exchanges
     
     def get_all_connected_users(self) -> List[Dict]:
         """Get all users with at least one connected exchange"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT DISTINCT u.id, u.telegram_id, u.username, u.first_name,
-                   COUNT(e.id) as exchange_count
-            FROM users u
-            JOIN exchanges e ON u.id = e.user_id
-            WHERE e.is_active = 1
-            GROUP BY u.id, u.telegram_id, u.username, u.first_name
-        ''')
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        users = []
-        for row in rows:
-            users.append({
-                'id': row[0], 'telegram_id': row[1], 'username': row[2],
-                'first_name': row[3], 'exchange_count': row[4]
-            })
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT DISTINCT u.id, u.telegram_id, u.username, u.first_name,
+                       COUNT(e.id) as exchange_count
+                FROM users u
+                JOIN exchanges e ON u.id = e.user_id
+                WHERE e.is_active = 1
+                GROUP BY u.id, u.telegram_id, u.username, u.first_name
+            ''')
+            
+            users = _fetch_dicts(cursor)
         return users
     
     def get_exchange_distribution(self) -> Dict[str, int]:
         """Get distribution of exchanges"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT exchange_name, COUNT(*) as count
-            FROM exchanges 
-            WHERE is_active = 1
-            GROUP BY exchange_name
-        ''')
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        distribution = {}
-        for row in rows:
-            distribution[row[0]] = row[1]
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT exchange_name, COUNT(*) as count
+                FROM exchanges 
+                WHERE is_active = 1
+                GROUP BY exchange_name
+            ''')
+            
+            distribution = dict(cursor.fetchall())
         return distribution
     
     def update_balance(self, exchange_id: int, balance: float):
         """Update exchange balance"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE exchanges 
-            SET balance = ?, last_used = CURRENT_TIMESTAMP
-            WHERE id = ?
-        ''', (balance, exchange_id))
-        
-        conn.commit()
-        conn.close()
+        with self.db.writer() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                UPDATE exchanges 
+                SET balance = ?, last_used = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (balance, exchange_id))
+            
+            conn.commit()
+
+    async def a_get_user_exchanges(self, user_id: int) -> List[Dict]:
+        """get_user_exchanges without blocking the event loop"""
+        return await asyncio.to_thread(self.get_user_exchanges, user_id)
+    
+    async def a_add_exchange(self, *args, **kwargs) -> int:
+        """add_exchange without blocking the event loop"""
+        return await _run_write(self.add_exchange, *args, **kwargs)
 
 class SignalModel:
     def __init__(self, db: Database):
@@ -437,139 +647,139 @@ class SignalModel:
                      leverage: int = 10, position_size_percent: float = 5.0,
                      created_by: int = None, expires_hours: int = 24) -> int:
         """Create new trading signal"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        expires_at = datetime.now() + timedelta(hours=expires_hours)
-        
-        cursor.execute('''
-            INSERT INTO signals (symbol, signal_type, entry_price, stop_loss, 
-                               take_profit, leverage, position_size_percent, 
-                               created_by, expires_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (symbol, signal_type, entry_price, stop_loss, take_profit,
-              leverage, position_size_percent, created_by, expires_at))
-        
-        signal_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self.db.writer() as conn:
+            cursor = conn.cursor()
+            
+            expires_at = _utc_timestamp(expires_hours * 3600)
+            
+            cursor.execute('''
+                INSERT INTO signals (symbol, signal_type, entry_price, stop_loss, 
+                                   take_profit, leverage, position_size_percent, 
+                                   created_by, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                RETURNING id
+            ''', (symbol, signal_type, entry_price, stop_loss, take_profit,
+                  leverage, position_size_percent, created_by, expires_at))
+            
+            signal_id = cursor.fetchone()[0]
+            conn.commit()
         return signal_id
     
+    def create_signals_bulk(self, rows: List[tuple], expires_hours: int = 24) -> int:
+        """Create many signals in one transaction
+        
+        Each row is (symbol, signal_type, entry_price, stop_loss, take_profit,
+        leverage, position_size_percent, created_by).
+        """
+        if not rows:
+            return 0
+        
+        expires_at = _utc_timestamp(expires_hours * 3600)
+        with self.db.writer() as conn:
+            cursor = conn.cursor()
+            _insert_rows(cursor, '''
+                INSERT INTO signals (symbol, signal_type, entry_price, stop_loss, 
+                                   take_profit, leverage, position_size_percent, 
+                                   created_by, expires_at)
+                VALUES ''', [tuple(row) + (expires_at,) for row in rows])
+            conn.commit()
+        return len(rows)
+    
     def get_subscribers(self) -> List[Dict]:
         """Get all subscribed users"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT DISTINCT u.id, u.telegram_id, u.username, s.auto_trade,
-                   s.max_position_size, s.use_stop_loss, s.use_take_profit
-            FROM users u
-            JOIN subscriptions s ON u.id = s.user_id
-            JOIN exchanges e ON u.id = e.user_id
-            WHERE s.is_subscribed = 1 AND e.is_active = 1
-        ''')
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        subscribers = []
-        for row in rows:
-            subscribers.append({
-                'user_id': row[0], 'telegram_id': row[1], 'username': row[2],
-                'auto_trade': row[3], 'max_position_size': row[4],
-                'use_stop_loss': row[5], 'use_take_profit': row[6]
-            })
+        return _cached_subscribers('subscribers', self._fetch_subscribers)
+    
+    def _fetch_subscribers(self) -> List[Dict]:
+        """Query subscribed users"""
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT u.id AS user_id, u.telegram_id, u.username, s.auto_trade,
+                       s.max_position_size, s.use_stop_loss, s.use_take_profit
+                FROM users u
+                JOIN subscriptions s ON u.id = s.user_id
+                WHERE s.is_subscribed = 1
+                  AND EXISTS (SELECT 1 FROM exchanges e WHERE e.user_id = u.id AND e.is_active = 1)
+            ''')
+            
+            subscribers = _fetch_dicts(cursor)
         return subscribers
     
     def get_unprocessed_signals(self) -> List[Dict]:
         """Get unprocessed signals"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, symbol, signal_type, entry_price, stop_loss, take_profit,
-                   leverage, position_size_percent, created_by, created_at
-            FROM signals 
-            WHERE is_processed = 0 AND status = 'active' 
-            AND expires_at > CURRENT_TIMESTAMP
-            ORDER BY created_at ASC
-        ''')
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        signals = []
-        for row in rows:
-            signals.append({
-                'id': row[0], 'symbol': row[1], 'signal_type': row[2],
-                'entry_price': row[3], 'stop_loss': row[4], 'take_profit': row[5],
-                'leverage': row[6], 'position_size_percent': row[7],
-                'created_by': row[8], 'created_at': row[9]
-            })
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT id, symbol, signal_type, entry_price, stop_loss, take_profit,
+                       leverage, position_size_percent, created_by, created_at
+                FROM signals 
+                WHERE is_processed = 0 AND status = 'active' 
+                AND expires_at > CURRENT_TIMESTAMP
+                ORDER BY created_at ASC
+            ''')
+            
+            signals = _fetch_dicts(cursor)
         return signals
     
     def mark_signal_processed(self, signal_id: int):
         """Mark signal as processed"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE signals SET is_processed = 1 WHERE id = ?
-        ''', (signal_id,))
-        
-        conn.commit()
-        conn.close()
+        with self.db.writer() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                UPDATE signals SET is_processed = 1 WHERE id = ?
+            ''', (signal_id,))
+            
+            conn.commit()
     
     def update_signal_results(self, signal_id: int, results: Dict):
         """Update signal with execution results"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE signals SET execution_results = ? WHERE id = ?
-        ''', (json.dumps(results), signal_id))
-        
-        conn.commit()
-        conn.close()
+        with self.db.writer() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                UPDATE signals SET execution_results = ? WHERE id = ?
+            ''', (_dumps(results), signal_id))
+            
+            conn.commit()
 
     def get_pending_signals(self) -> List[Dict]:
         """Get pending signals that need processing"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, symbol, signal_type, entry_price, stop_loss, take_profit,
-               leverage, position_size_percent, created_by, created_at
-        FROM signals 
-        WHERE status = 'pending' AND expires_at > CURRENT_TIMESTAMP
-        ORDER BY created_at ASC
-        ''')
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        signals = []
-        for row in rows:
-            signals.append({
-                'id': row[0], 'symbol': row[1], 'signal_type': row[2],
-                'entry_price': row[3], 'stop_loss': row[4], 'take_profit': row[5],
-                'leverage': row[6], 'position_size_percent': row[7],
-                'created_by': row[8], 'created_at': row[9],
-                'action': row[2]  # Add action field for compatibility
-            })
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT id, symbol, signal_type, entry_price, stop_loss, take_profit,
+                   leverage, position_size_percent, created_by, created_at,
+                   signal_type AS action
+            FROM signals 
+            WHERE status = 'pending' AND expires_at > CURRENT_TIMESTAMP
+            ORDER BY created_at ASC
+            ''')
+            
+            signals = _fetch_dicts(cursor)
         return signals
 
     def mark_signal_processed(self, signal_id: int):
         """Mark signal as processed"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE signals SET status = 'processed' WHERE id = ?
-        ''', (signal_id,))
-        
-        conn.commit()
-        conn.close()
+        with self.db.writer() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                UPDATE signals SET status = 'processed' WHERE id = ?
+            ''', (signal_id,))
+            
+            conn.commit()
+
+    async def a_get_pending_signals(self) -> List[Dict]:
+        """get_pending_signals without blocking the event loop"""
+        return await asyncio.to_thread(self.get_pending_signals)
+    
+    async def a_mark_signal_processed(self, signal_id: int):
+        """mark_signal_processed without blocking the event loop"""
+        await _run_write(self.mark_signal_processed, signal_id)
 
 class TradeModel:
     def __init__(self, db: Database):
@@ -579,149 +789,156 @@ class TradeModel:
                              symbol: str, side: str, quantity: float, entry_price: float,
                              order_id: str = None) -> int:
         """Record a trade execution"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO trade_executions 
-            (signal_id, user_id, exchange_name, symbol, side, quantity, 
-             entry_price, order_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (signal_id, user_id, exchange_name, symbol, side, quantity,
-              entry_price, order_id))
-        
-        trade_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self.db.writer() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(SQL_INSERT_TRADE_EXECUTION, (signal_id, user_id, exchange_name, symbol,
+                                                        side, quantity, entry_price, order_id))
+            
+            trade_id = cursor.fetchone()[0]
+            conn.commit()
         return trade_id
     
+    def record_trade_executions_bulk(self, rows: List[tuple]) -> int:
+        """Record many trade executions in one transaction
+        
+        Each row is (signal_id, user_id, exchange_name, symbol, side, quantity,
+        entry_price, order_id).
+        """
+        if not rows:
+            return 0
+        
+        with self.db.writer() as conn:
+            cursor = conn.cursor()
+            _insert_rows(cursor, '''
+                INSERT INTO trade_executions 
+                (signal_id, user_id, exchange_name, symbol, side, quantity, 
+                 entry_price, order_id)
+                VALUES ''', rows)
+            conn.commit()
+        return len(rows)
+    
     def get_user_trades(self, user_id: int, limit: int = 10) -> List[Dict]:
         """Get recent trades for a user"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT t.id, t.symbol, t.side, t.quantity, t.entry_price,
-                   t.current_price, t.pnl, t.status, t.executed_at,
-                   s.signal_type, t.exchange_name, t.order_id
-            FROM trade_executions t
-            JOIN signals s ON t.signal_id = s.id
-            WHERE t.user_id = ?
-            ORDER BY t.executed_at DESC
-            LIMIT ?
-        ''', (user_id, limit))
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        trades = []
-        for row in rows:
-            trades.append({
-                'id': row[0], 'symbol': row[1], 'side': row[2], 'quantity': row[3],
-                'entry_price': row[4], 'current_price': row[5], 'pnl': row[6],
-                'status': row[7], 'executed_at': row[8], 'signal_type': row[9],
-                'exchange_name': row[10], 'order_id': row[11]
-            })
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT t.id, t.symbol, t.side, t.quantity, t.entry_price,
+                       t.current_price, t.pnl, t.status, t.executed_at,
+                       s.signal_type, t.exchange_name, t.order_id
+                FROM trade_executions t
+                JOIN signals s ON t.signal_id = s.id
+                WHERE t.user_id = ?
+                ORDER BY t.executed_at DESC
+                LIMIT ?
+            ''', (user_id, limit))
+            
+            trades = _fetch_dicts(cursor)
         return trades
     
+    def iter_active_trades(self) -> Iterator[Dict]:
+        """Yield active trades, newest first; the pooled connection is held until iteration ends"""
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.arraysize = ITER_BATCH_SIZE
+            
+            cursor.execute('''
+                SELECT id, signal_id, user_id, exchange_name, symbol, side,
+                       quantity, entry_price, order_id, executed_at
+                FROM trade_executions 
+                WHERE status = 'open'
+                ORDER BY executed_at DESC
+            ''')
+            
+            yield from _iter_dicts(cursor)
+    
     def get_active_trades(self) -> List[Dict]:
         """Get all active trades"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, signal_id, user_id, exchange_name, symbol, side,
-                   quantity, entry_price, order_id, executed_at
-            FROM trade_executions 
-            WHERE status = 'open'
-            ORDER BY executed_at DESC
-        ''')
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        trades = []
-        for row in rows:
-            trades.append({
-                'id': row[0], 'signal_id': row[1], 'user_id': row[2],
-                'exchange_name': row[3], 'symbol': row[4], 'side': row[5],
-                'quantity': row[6], 'entry_price': row[7], 'order_id': row[8],
-                'executed_at': row[9]
-            })
-        return trades
+        return list(self.iter_active_trades())
     
     def get_total_trades_count(self) -> int:
         """Get total number of trades"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM trade_executions")
-        count = cursor.fetchone()[0]
-        conn.close()
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM trade_executions")
+            count = cursor.fetchone()[0]
         return count
     
     def get_successful_trades_count(self) -> int:
         """Get number of profitable trades"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM trade_executions WHERE pnl > 0")
-        count = cursor.fetchone()[0]
-        conn.close()
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM trade_executions WHERE pnl > 0")
+            count = cursor.fetchone()[0]
         return count
     
     def get_total_volume(self) -> float:
         """Get total trading volume"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT SUM(quantity * entry_price) FROM trade_executions")
-        volume = cursor.fetchone()[0] or 0
-        conn.close()
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT SUM(quantity * entry_price) FROM trade_executions")
+            volume = cursor.fetchone()[0] or 0
         return volume
     
     def get_total_pnl(self) -> float:
         """Get total P&L across all trades"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT SUM(pnl) FROM trade_executions")
-        pnl = cursor.fetchone()[0] or 0
-        conn.close()
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT SUM(pnl) FROM trade_executions")
+            pnl = cursor.fetchone()[0] or 0
         return pnl
     
+    def get_global_stats(self) -> Dict[str, Any]:
+        """Get platform-wide user and trade aggregates in a single query"""
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT (SELECT COUNT(*) FROM users),
+                       (SELECT COUNT(*) FROM users WHERE last_active >= datetime('now', '-7 days')),
+                       (SELECT COUNT(*) FROM users WHERE last_active >= datetime('now', '-30 days')),
+                       COUNT(*),
+                       COALESCE(SUM(CASE WHEN pnl > 0 THEN 1 ELSE 0 END), 0),
+                       COALESCE(SUM(quantity * entry_price), 0),
+                       COALESCE(SUM(pnl), 0)
+                FROM trade_executions
+            ''')
+            row = cursor.fetchone()
+        
+        return {
+            'total_users': row[0], 'active_users_7d': row[1], 'active_users_30d': row[2],
+            'total_trades': row[3], 'successful_trades': row[4],
+            'total_volume': row[5], 'total_pnl': row[6]
+        }
+    
     def get_daily_pnl(self, user_id: int, days: int = 7) -> List[Dict]:
         """Get daily P&L for user"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT date, pnl, trades_count
-            FROM daily_pnl 
-            WHERE user_id = ?
-            ORDER BY date DESC
-            LIMIT ?
-        ''', (user_id, days))
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        daily_data = []
-        for row in rows:
-            daily_data.append({
-                'date': row[0], 'pnl': row[1], 'trades_count': row[2]
-            })
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT date, pnl, trades_count
+                FROM daily_pnl 
+                WHERE user_id = ?
+                ORDER BY date DESC
+                LIMIT ?
+            ''', (user_id, days))
+            
+            daily_data = _fetch_dicts(cursor)
         return daily_data
     
     def get_monthly_pnl(self, user_id: int) -> Dict:
         """Get monthly P&L summary"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT SUM(pnl) as monthly_pnl, SUM(trades_count) as monthly_trades
-            FROM daily_pnl 
-            WHERE user_id = ? AND date >= date('now', '-30 days')
-        ''', (user_id,))
-        
-        row = cursor.fetchone()
-        conn.close()
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT SUM(pnl) as monthly_pnl, SUM(trades_count) as monthly_trades
+                FROM daily_pnl 
+                WHERE user_id = ? AND date >= date('now', '-30 days')
+            ''', (user_id,))
+            
+            row = cursor.fetchone()
         
         if row:
             return {
@@ -730,130 +947,205 @@ class TradeModel:
             }
         return {'monthly_pnl': 0, 'monthly_trades': 0}
 
+    def iter_open_trades(self) -> Iterator[Dict]:
+        """Yield open trades with stop loss/take profit; the pooled connection is held until iteration ends"""
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.arraysize = ITER_BATCH_SIZE
+            
+            cursor.execute('''
+                SELECT t.id, t.signal_id, t.user_id, t.exchange_name, t.symbol, 
+                   t.side, t.quantity, t.entry_price, t.current_price, t.pnl,
+                   t.order_id, t.executed_at, s.stop_loss, s.take_profit
+            FROM trade_executions t
+            JOIN signals s ON t.signal_id = s.id
+            WHERE t.status = 'open'
+            ORDER BY t.executed_at DESC
+            ''')
+            
+            yield from _iter_dicts(cursor)
+    
     def get_open_trades(self) -> List[Dict]:
         """Get all open trades"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT t.id, t.signal_id, t.user_id, t.exchange_name, t.symbol, 
-               t.side, t.quantity, t.entry_price, t.current_price, t.pnl,
-               t.order_id, t.executed_at, s.stop_loss, s.take_profit
-        FROM trade_executions t
-        JOIN signals s ON t.signal_id = s.id
-        WHERE t.status = 'open'
-        ORDER BY t.executed_at DESC
-        ''')
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        trades = []
-        for row in rows:
-            trades.append({
-                'id': row[0], 'signal_id': row[1], 'user_id': row[2],
-                'exchange_name': row[3], 'symbol': row[4], 'side': row[5],
-                'quantity': row[6], 'entry_price': row[7], 'current_price': row[8],
-                'pnl': row[9], 'order_id': row[10], 'executed_at': row[11],
-                'stop_loss': row[12], 'take_profit': row[13]
-            })
-        return trades
+        return list(self.iter_open_trades())
 
     def update_trade_pnl(self, trade_id: int, pnl: float, current_price: float):
         """Update trade P&L and current price"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE trade_executions 
-            SET pnl = ?, current_price = ?
-            WHERE id = ?
-        ''', (pnl, current_price, trade_id))
-        
-        conn.commit()
-        conn.close()
+        with self.db.writer() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(SQL_UPDATE_TRADE_PNL, (pnl, current_price, trade_id))
+            
+            conn.commit()
+    
+    def update_trade_pnl_bulk(self, updates: List[Tuple[float, float, int]]):
+        """Apply (pnl, current_price, trade_id) updates in one transaction"""
+        if not updates:
+            return
+        with self.db.writer() as conn:
+            cursor = conn.cursor()
+            
+            cursor.executemany(SQL_UPDATE_TRADE_PNL, updates)
+            
+            conn.commit()
 
     def close_trade(self, trade_id: int, close_price: float, final_pnl: float, reason: str):
         """Close a trade"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE trade_executions 
-            SET status = 'closed', current_price = ?, pnl = ?, closed_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        ''', (close_price, final_pnl, trade_id))
-        
-        conn.commit()
-        conn.close()
+        with self.db.writer() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                UPDATE trade_executions 
+                SET status = 'closed', current_price = ?, pnl = ?, closed_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND status = 'open'
+                RETURNING user_id
+            ''', (close_price, final_pnl, trade_id))
+            row = cursor.fetchone()
+            
+            # Fold the result into the owner's portfolio and daily P&L in the same transaction
+            if row:
+                user_id = row[0]
+                won = 1 if final_pnl > 0 else 0
+                lost = 1 if final_pnl < 0 else 0
+                cursor.execute('''
+                    UPDATE portfolios 
+                    SET total_trades = total_trades + 1,
+                        winning_trades = winning_trades + ?,
+                        losing_trades = losing_trades + ?,
+                        total_pnl = total_pnl + ?,
+                        best_trade = MAX(best_trade, ?),
+                        worst_trade = MIN(worst_trade, ?),
+                        win_rate = (winning_trades + ?) * 100.0 / (total_trades + 1),
+                        average_trade = (total_pnl + ?) / (total_trades + 1),
+                        first_trade_date = COALESCE(first_trade_date, CURRENT_TIMESTAMP),
+                        last_updated = CURRENT_TIMESTAMP
+                    WHERE user_id = ?
+                ''', (won, lost, final_pnl, final_pnl, final_pnl, won, final_pnl, user_id))
+                cursor.execute(SQL_UPSERT_DAILY_PNL,
+                               (user_id, _utc_timestamp()[:10], final_pnl, 1))
+            
+            conn.commit()
+    
+    def upsert_daily_pnl(self, user_id: int, date: str, pnl_delta: float, trades_delta: int = 1):
+        """Add a P&L and trade count delta to the user's row for date (YYYY-MM-DD)"""
+        with self.db.writer() as conn:
+            conn.execute(SQL_UPSERT_DAILY_PNL, (user_id, date, pnl_delta, trades_delta))
+            conn.commit()
 
-    def create_trade(self, user_id: int, exchange_id: int, signal_id: int, symbol: str,
+    def create_trade(self, user_id: int, exchange_name: str, signal_id: int, symbol: str,
                 action: str, entry_price: float, quantity: float, stop_loss: float = None,
                 take_profit: float = None, leverage: int = 10) -> int:
         """Create a new trade record"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        side = 'BUY' if action.upper() in ['LONG', 'BUY'] else 'SELL'
-        
-        cursor.execute('''
-            INSERT INTO trade_executions 
-            (signal_id, user_id, exchange_name, symbol, side, quantity, entry_price)
-        SELECT ?, ?, e.exchange_name, ?, ?, ?, ?
-        FROM exchanges e WHERE e.id = ?
-        ''', (signal_id, user_id, symbol, side, quantity, entry_price, exchange_id))
-        
-        trade_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self.db.writer() as conn:
+            cursor = conn.cursor()
+            
+            side = 'BUY' if action.upper() in ['LONG', 'BUY'] else 'SELL'
+            
+            cursor.execute('''
+                INSERT INTO trade_executions 
+                (signal_id, user_id, exchange_name, symbol, side, quantity, entry_price)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                RETURNING id
+            ''', (signal_id, user_id, exchange_name, symbol, side, quantity, entry_price))
+            
+            trade_id = cursor.fetchone()[0]
+            conn.commit()
         return trade_id
 
+    async def a_get_user_trades(self, user_id: int, limit: int = 10) -> List[Dict]:
+        """get_user_trades without blocking the event loop"""
+        return await asyncio.to_thread(self.get_user_trades, user_id, limit)
+    
+    async def a_get_open_trades(self) -> List[Dict]:
+        """get_open_trades without blocking the event loop"""
+        return await asyncio.to_thread(self.get_open_trades)
+    
+    async def a_update_trade_pnl(self, trade_id: int, pnl: float, current_price: float):
+        """update_trade_pnl without blocking the event loop"""
+        await _run_write(self.update_trade_pnl, trade_id, pnl, current_price)
+    
+    async def a_update_trade_pnl_bulk(self, updates: List[Tuple[float, float, int]]):
+        """update_trade_pnl_bulk without blocking the event loop"""
+        await _run_write(self.update_trade_pnl_bulk, updates)
+    
+    async def a_close_trade(self, trade_id: int, close_price: float, final_pnl: float, reason: str):
+        """close_trade without blocking the event loop"""
+        await _run_write(self.close_trade, trade_id, close_price, final_pnl, reason)
+    
+    async def a_create_trade(self, *args, **kwargs) -> int:
+        """create_trade without blocking the event loop"""
+        return await _run_write(self.create_trade, *args, **kwargs)
+    
+    async def a_record_trade_executions_bulk(self, rows: List[tuple]) -> int:
+        """record_trade_executions_bulk without blocking the event loop"""
+        return await _run_write(self.record_trade_executions_bulk, rows)
+
 class PortfolioModel:
     def __init__(self, db: Database):
         self.db = db
     
     def get_user_portfolio(self, user_id: int) -> Optional[Dict]:
         """Get user portfolio overview"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT total_balance, total_pnl, pnl_percentage, total_trades,
-                   winning_trades, losing_trades, win_rate, best_trade,
-                   worst_trade, average_trade, first_trade_date, last_updated
-            FROM portfolios WHERE user_id = ?
-        ''', (user_id,))
-        
-        row = cursor.fetchone()
-        conn.close()
-        
-        if row:
-            return {
-                'total_balance': row[0], 'total_pnl': row[1], 'pnl_percentage': row[2],
-                'total_trades': row[3], 'winning_trades': row[4], 'losing_trades': row[5],
-                'win_rate': row[6], 'best_trade': row[7], 'worst_trade': row[8],
-                'average_trade': row[9], 'first_trade_date': row[10], 'last_updated': row[11]
-            }
-        return None
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT total_balance, total_pnl, pnl_percentage, total_trades,
+                       winning_trades, losing_trades, win_rate, best_trade,
+                       worst_trade, average_trade, first_trade_date, last_updated
+                FROM portfolios WHERE user_id = ?
+            ''', (user_id,))
+            
+            row = _fetch_dict(cursor)
+        return row
     
     def update_user_portfolio(self, user_id: int, total_pnl: float, 
                             total_trades: int, winning_trades: int, losing_trades: int):
         """Update user portfolio statistics"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        # Calculate derived metrics
-        win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
-        average_trade = total_pnl / total_trades if total_trades > 0 else 0
-        
-        cursor.execute('''
-            UPDATE portfolios 
-            SET total_pnl = ?, total_trades = ?, winning_trades = ?, 
-                losing_trades = ?, win_rate = ?, average_trade = ?,
-                last_updated = CURRENT_TIMESTAMP
-            WHERE user_id = ?
-        ''', (total_pnl, total_trades, winning_trades, losing_trades, 
-              win_rate, average_trade, user_id))
-        
-        conn.commit()
-        conn.close()
+        with self.db.writer() as conn:
+            cursor = conn.cursor()
+            
+            # Calculate derived metrics
+            win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
+            average_trade = total_pnl / total_trades if total_trades > 0 else 0
+            
+            cursor.execute('''
+                UPDATE portfolios 
+                SET total_pnl = ?, total_trades = ?, winning_trades = ?, 
+                    losing_trades = ?, win_rate = ?, average_trade = ?,
+                    last_updated = CURRENT_TIMESTAMP
+                WHERE user_id = ?
+            ''', (total_pnl, total_trades, winning_trades, losing_trades, 
+                  win_rate, average_trade, user_id))
+            
+            conn.commit()
+    
+    def rebuild(self, user_id: int):
+        """Recompute portfolio statistics from the user's closed trades"""
+        with self.db.writer() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT COUNT(*),
+                       COALESCE(SUM(CASE WHEN pnl > 0 THEN 1 ELSE 0 END), 0),
+                       COALESCE(SUM(CASE WHEN pnl < 0 THEN 1 ELSE 0 END), 0),
+                       COALESCE(SUM(pnl), 0), MAX(pnl), MIN(pnl), MIN(executed_at)
+                FROM trade_executions
+                WHERE user_id = ? AND status = 'closed'
+            ''', (user_id,))
+            total_trades, winning_trades, losing_trades, total_pnl, best, worst, first_date = cursor.fetchone()
+            
+            win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
+            average_trade = total_pnl / total_trades if total_trades > 0 else 0
+            
+            cursor.execute('''
+                UPDATE portfolios 
+                SET total_pnl = ?, total_trades = ?, winning_trades = ?, 
+                    losing_trades = ?, win_rate = ?, average_trade = ?,
+                    best_trade = ?, worst_trade = ?, first_trade_date = ?,
+                    last_updated = CURRENT_TIMESTAMP
+                WHERE user_id = ?
+            ''', (total_pnl, total_trades, winning_trades, losing_trades, win_rate,
+                  average_trade, max(best or 0, 0), min(worst or 0, 0), first_date, user_id))
+            
+            conn.commit()
@@ -1,136 +1,233 @@
+import asyncio
 import os
 import json
 import time
 import hmac
 import hashlib
 import base64
-import requests
+import secrets
+import heapq
+import aiohttp
 from urllib.parse import urlencode, parse_qs
 from cryptography.fernet import Fernet
 import sqlite3
-from typing import Dict, Optional, Tuple
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+DB_PATH = 'trading_bot.db'
+
+# Insert statements defined once so sqlite's per-connection statement cache always hits
+SQL_INSERT_OAUTH_TOKEN = '''INSERT INTO oauth_tokens 
+    (user_id, exchange_name, access_token_encrypted, refresh_token_encrypted, expires_at) 
+    VALUES (?, ?, ?, ?, ?)'''
+SQL_INSERT_EXCHANGE_KEYS = '''INSERT INTO exchanges 
+    (user_id, exchange_name, api_key_encrypted, api_secret_encrypted, passphrase_encrypted) 
+    VALUES (?, ?, ?, ?, ?)'''
+
+# create-sub-api-key parameters in sorted order, so the signature string needs no per-call sort
+_BYBIT_SIG_KEYS = ('api_key', 'note', 'readOnly', 'timestamp', 'unified', 'uta')
+
+# exchange -> (authorize URL, client id env var, requested scope)
+_OAUTH_CONFIG: Dict[str, Tuple[str, str, str]] = {
+    # Binance doesn't have OAuth; this points at a custom page that guides users through API key creation
+    'binance': ('https://accounts.binance.com/oauth/authorize', 'BINANCE_CLIENT_ID', 'read,trade'),
+    'bybit': ('https://api.bybit.com/oauth/authorize', 'BYBIT_CLIENT_ID', 'read,trade'),
+    'bitget': ('https://api.bitget.com/oauth/authorize', 'BITGET_CLIENT_ID', 'read,trade'),
+    'kucoin': ('https://api.kucoin.com/oauth/authorize', 'KUCOIN_CLIENT_ID', 'General,Trade'),
+}
+_CLIENT_ID_DEFAULTS = {'binance': 'your_app_id'}
+
+@lru_cache(maxsize=1024)
+def _hmac_template(key: bytes, digestmod) -> hmac.HMAC:
+    """Keyed HMAC state for a secret; copies of it skip the per-request key setup"""
+    return hmac.new(key, digestmod=digestmod)
+
+@lru_cache(maxsize=None)
+def _auth_url_prefix(exchange: str) -> Optional[str]:
+    """Static part of an exchange's authorize URL, built on first use (after .env is loaded)"""
+    cfg = _OAUTH_CONFIG.get(exchange)
+    if not cfg:
+        return None
+    
+    base_url, client_id_env, scope = cfg
+    params = {
+        'client_id': os.getenv(client_id_env, _CLIENT_ID_DEFAULTS.get(exchange)),
+        'response_type': 'code',
+        'scope': scope
+    }
+    return f"{base_url}?{urlencode(params)}"
+
+# State tokens carry their own data plus a keyed hash, so callbacks need no server-side session
+STATE_TOKEN_TTL = 600
+STATE_SIG_SIZE = 16
+
+# Per-connection settings (not persisted in the file), applied on every open
+CONNECTION_PRAGMAS = (
+    'PRAGMA synchronous=NORMAL;'
+    'PRAGMA temp_store=MEMORY;'
+    'PRAGMA busy_timeout=5000;'
+    'PRAGMA cache_size=-20000;'
+)
+
+# journal_mode=WAL is persisted in the database file, so it only needs setting once per process
+_wal_enabled = False
+
+def _open_db() -> sqlite3.Connection:
+    """Open the bot database in autocommit mode with WAL and relaxed fsync"""
+    global _wal_enabled
+    conn = sqlite3.connect(DB_PATH, isolation_level=None, check_same_thread=False, cached_statements=128)
+    # One C call for the whole batch; executescript commits first, which is harmless before any DML
+    conn.executescript(('' if _wal_enabled else 'PRAGMA journal_mode=WAL;') + CONNECTION_PRAGMAS)
+    _wal_enabled = True
+    return conn
+
+def _executemany(conn: sqlite3.Connection, sql: str, params: List[tuple]):
+    """Run sql for every row of params inside one explicit transaction (connections are autocommit)"""
+    conn.execute('BEGIN')
+    try:
+        conn.executemany(sql, params)
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    conn.execute('COMMIT')
+
+def _encrypt_many(cipher: Fernet, values: List[Optional[str]]) -> List[bytes]:
+    """Fernet-encrypt each value (None -> b'') with IVs drawn from a single os.urandom call"""
+    now = int(time.time())
+    ivs = os.urandom(16 * len(values))
+    return [
+        cipher._encrypt_from_parts(value.encode(), now, ivs[16 * i:16 * i + 16]) if value is not None else b''
+        for i, value in enumerate(values)
+    ]
 
 class ExchangeAuthManager:
     """Handles automatic exchange authorization and API key management"""
     
     def __init__(self, encryption_key: bytes):
         self.cipher_suite = Fernet(encryption_key)
-        self.auth_sessions = {}  # Store temporary auth sessions
+        self._state_key = hashlib.sha256(self.cipher_suite._signing_key).digest()
+        self._conn = None
+        self._conn_lock = threading.RLock()  # also serializes writes from worker threads
+        self._schema_ready = False
+        self._http: Optional[aiohttp.ClientSession] = None
+        # State tokens are signed rather than stored; only consumed nonces are remembered until they expire
+        self._consumed_states: Dict[str, int] = {}  # nonce -> expires_at
+        self._expiry_heap: List[Tuple[int, str]] = []  # (expires_at, nonce), earliest first
+    
+    def _get_conn(self) -> sqlite3.Connection:
+        """Return the shared database connection, opening it on first use"""
+        with self._conn_lock:
+            if self._conn is None:
+                self._conn = _open_db()
+            if not self._schema_ready:
+                self._ensure_schema(self._conn)
+            return self._conn
+    
+    async def _get_http(self) -> aiohttp.ClientSession:
+        """Return the shared keep-alive HTTP session, creating it on first use"""
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession()
+        return self._http
+    
+    async def close(self):
+        """Close the HTTP session"""
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+    
+    def _ensure_schema(self, conn: sqlite3.Connection):
+        """Create the oauth_tokens table and its lookup index once per manager"""
+        conn.execute('''CREATE TABLE IF NOT EXISTS oauth_tokens (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER,
+            exchange_name TEXT,
+            access_token_encrypted BLOB,
+            refresh_token_encrypted BLOB,
+            expires_at INTEGER,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_oauth_user_exch ON oauth_tokens(user_id, exchange_name)')
+        self._schema_ready = True
         
     def generate_auth_url(self, exchange: str, user_id: int, callback_url: str) -> Optional[str]:
         """Generate authorization URL for supported exchanges"""
-        
-        if exchange == 'binance':
-            return self._binance_auth_url(user_id, callback_url)
-        elif exchange == 'bybit':
-            return self._bybit_auth_url(user_id, callback_url)
-        elif exchange == 'bitget':
-            return self._bitget_auth_url(user_id, callback_url)
-        elif exchange == 'kucoin':
-            return self._kucoin_auth_url(user_id, callback_url)
-        else:
+        prefix = _auth_url_prefix(exchange)
+        if prefix is None:
             return None
-    
-    def _binance_auth_url(self, user_id: int, callback_url: str) -> str:
-        """Generate Binance OAuth URL"""
-        # Binance doesn't have traditional OAuth, but we can use their API key creation flow
-        # This would redirect to a custom page that guides users through API creation
         
-        state = self._generate_state_token(user_id, 'binance')
         params = {
-            'response_type': 'code',
-            'client_id': os.getenv('BINANCE_CLIENT_ID', 'your_app_id'),
             'redirect_uri': callback_url,
-            'state': state,
-            'scope': 'read,trade'  # Request necessary permissions
+            'state': self._generate_state_token(user_id, exchange)
         }
-        
-        # Note: Binance doesn't have OAuth, so this would be a custom implementation
-        base_url = "https://accounts.binance.com/oauth/authorize"
-        return f"{base_url}?{urlencode(params)}"
+        return f"{prefix}&{urlencode(params)}"
     
-    def _bybit_auth_url(self, user_id: int, callback_url: str) -> str:
-        """Generate Bybit OAuth URL"""
-        state = self._generate_state_token(user_id, 'bybit')
-        params = {
-            'client_id': os.getenv('BYBIT_CLIENT_ID'),
-            'response_type': 'code',
-            'redirect_uri': callback_url,
-            'state': state,
-            'scope': 'read,trade'
-        }
+    def _generate_state_token(self, user_id: int, exchange: str) -> str:
+        """Generate a signed, self-contained state token for OAuth"""
+        if exchange not in _OAUTH_CONFIG:
+            raise ValueError(f"OAuth not supported for {exchange}")
         
-        base_url = "https://api.bybit.com/oauth/authorize"
-        return f"{base_url}?{urlencode(params)}"
-    
-    def _bitget_auth_url(self, user_id: int, callback_url: str) -> str:
-        """Generate Bitget OAuth URL"""
-        state = self._generate_state_token(user_id, 'bitget')
-        params = {
-            'client_id': os.getenv('BITGET_CLIENT_ID'),
-            'response_type': 'code',
-            'redirect_uri': callback_url,
-            'state': state,
-            'scope': 'read,trade'
-        }
+        # Fixed schema of ints, a hex nonce and a whitelisted exchange name: nothing needs escaping
+        payload = (f'{{"user_id":{int(user_id)},"exchange":"{exchange}",'
+                   f'"timestamp":{int(time.time())},"nonce":"{secrets.token_hex(16)}"}}').encode()
         
-        base_url = "https://api.bitget.com/oauth/authorize"
-        return f"{base_url}?{urlencode(params)}"
+        return base64.urlsafe_b64encode(payload + self._sign_state(payload)).decode()
     
-    def _kucoin_auth_url(self, user_id: int, callback_url: str) -> str:
-        """Generate KuCoin OAuth URL (KuCoin has proper OAuth support)"""
-        state = self._generate_state_token(user_id, 'kucoin')
-        params = {
-            'client_id': os.getenv('KUCOIN_CLIENT_ID'),
-            'response_type': 'code',
-            'redirect_uri': callback_url,
-            'state': state,
-            'scope': 'General,Trade'
-        }
-        
-        base_url = "https://api.kucoin.com/oauth/authorize"
-        return f"{base_url}?{urlencode(params)}"
+    def _sign_state(self, payload: bytes) -> bytes:
+        """Keyed BLAKE2b tag of a state payload (internal only; exchange APIs still get HMAC-SHA256)"""
+        return hashlib.blake2b(payload, key=self._state_key, digest_size=STATE_SIG_SIZE).digest()
     
-    def _generate_state_token(self, user_id: int, exchange: str) -> str:
-        """Generate secure state token for OAuth"""
-        import secrets
-        state_data = {
-            'user_id': user_id,
-            'exchange': exchange,
-            'timestamp': int(time.time()),
-            'nonce': secrets.token_hex(16)
-        }
-        
-        state_json = json.dumps(state_data)
-        state_token = base64.urlsafe_b64encode(state_json.encode()).decode()
+    def _verify_state_token(self, state: str) -> Optional[Dict]:
+        """Return the state data if the token is authentic, unexpired and unused, else None"""
+        try:
+            raw = base64.urlsafe_b64decode(state.encode())
+        except ValueError:
+            return None
         
-        # Store in temporary session
-        self.auth_sessions[state_token] = state_data
+        payload, signature = raw[:-STATE_SIG_SIZE], raw[-STATE_SIG_SIZE:]
+        if not payload or not hmac.compare_digest(signature, self._sign_state(payload)):
+            return None
         
-        return state_token
+        state_data = json.loads(payload)
+        if time.time() - state_data['timestamp'] > STATE_TOKEN_TTL or state_data['nonce'] in self._consumed_states:
+            return None
+        return state_data
+    
+    def cleanup_expired_sessions(self):
+        """Forget consumed state nonces that have expired and can no longer be replayed"""
+        current_time = int(time.time())
+        while self._expiry_heap and self._expiry_heap[0][0] < current_time:
+            _, nonce = heapq.heappop(self._expiry_heap)
+            self._consumed_states.pop(nonce, None)
+    
+    def _consume_state(self, nonce: str, expires_at: int):
+        """Record a state nonce as used, sweeping expired ones every 256 entries"""
+        self._consumed_states[nonce] = expires_at
+        heapq.heappush(self._expiry_heap, (expires_at, nonce))
+        if len(self._consumed_states) % 256 == 0:
+            self.cleanup_expired_sessions()
     
     async def handle_oauth_callback(self, code: str, state: str) -> Dict:
         """Handle OAuth callback and exchange code for tokens"""
         
-        if state not in self.auth_sessions:
+        session_data = self._verify_state_token(state)
+        if session_data is None:
             raise ValueError("Invalid or expired state token")
+        # Consumed before any await, so a replayed state cannot race the first use
+        self._consume_state(session_data['nonce'], session_data['timestamp'] + STATE_TOKEN_TTL)
         
-        session_data = self.auth_sessions[state]
         exchange = session_data['exchange']
         user_id = session_data['user_id']
         
-        try:
-            if exchange == 'kucoin':
-                return await self._kucoin_exchange_code(code, user_id)
-            elif exchange == 'bybit':
-                return await self._bybit_exchange_code(code, user_id)
-            elif exchange == 'bitget':
-                return await self._bitget_exchange_code(code, user_id)
-            else:
-                raise ValueError(f"OAuth not supported for {exchange}")
-        finally:
-            # Clean up session
-            self.auth_sessions.pop(state, None)
+        if exchange == 'kucoin':
+            return await self._kucoin_exchange_code(code, user_id)
+        elif exchange == 'bybit':
+            return await self._bybit_exchange_code(code, user_id)
+        elif exchange == 'bitget':
+            return await self._bitget_exchange_code(code, user_id)
+        else:
+            raise ValueError(f"OAuth not supported for {exchange}")
     
     async def _kucoin_exchange_code(self, code: str, user_id: int) -> Dict:
         """Exchange authorization code for KuCoin access token"""
@@ -144,61 +241,81 @@ class ExchangeAuthManager:
             'redirect_uri': os.getenv('OAUTH_CALLBACK_URL')
         }
         
-        response = requests.post(token_url, data=data)
-        if response.status_code == 200:
-            token_data = response.json()
-            
-            # Store encrypted tokens
-            access_token = token_data['access_token']
-            refresh_token = token_data.get('refresh_token', '')
-            
-            await self._store_oauth_tokens(user_id, 'kucoin', access_token, refresh_token)
-            
-            return {
-                'success': True,
-                'exchange': 'kucoin',
-                'message': 'KuCoin connected successfully via OAuth'
-            }
-        else:
-            raise Exception(f"Token exchange failed: {response.text}")
-    
-    async def _store_oauth_tokens(self, user_id: int, exchange: str, access_token: str, refresh_token: str = ''):
-        """Store OAuth tokens securely in database"""
+        # requests used to drop unset fields; aiohttp would send them as "None"
+        data = {k: v for k, v in data.items() if v is not None}
         
-        encrypted_access = self.cipher_suite.encrypt(access_token.encode())
-        encrypted_refresh = self.cipher_suite.encrypt(refresh_token.encode()) if refresh_token else b''
+        http = await self._get_http()
+        async with http.post(token_url, data=data) as response:
+            if response.status != 200:
+                raise Exception(f"Token exchange failed: {await response.text()}")
+            token_data = await response.json(content_type=None)
         
-        conn = sqlite3.connect('trading_bot.db')
-        c = conn.cursor()
+        # Store encrypted tokens
+        access_token = token_data['access_token']
+        refresh_token = token_data.get('refresh_token', '')
         
-        # Create OAuth tokens table if not exists
-        c.execute('''CREATE TABLE IF NOT EXISTS oauth_tokens (
-            id INTEGER PRIMARY KEY,
-            user_id INTEGER,
-            exchange_name TEXT,
-            access_token_encrypted TEXT,
-            refresh_token_encrypted TEXT,
-            expires_at INTEGER,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )''')
+        await self._store_oauth_tokens(user_id, 'kucoin', access_token, refresh_token)
+        
+        return {
+            'success': True,
+            'exchange': 'kucoin',
+            'message': 'KuCoin connected successfully via OAuth'
+        }
+    
+    async def _store_oauth_tokens(self, user_id: int, exchange: str, access_token: str, refresh_token: str = ''):
+        """Store OAuth tokens securely in database"""
+        await self._store_oauth_tokens_bulk([(user_id, exchange, access_token, refresh_token)])
+    
+    async def _store_oauth_tokens_bulk(self, rows: List[Tuple[int, str, str, str]]):
+        """Store (user_id, exchange, access_token, refresh_token) rows in one transaction"""
+        await asyncio.to_thread(self._store_oauth_tokens_sync, rows)
+    
+    def _store_oauth_tokens_sync(self, rows: List[Tuple[int, str, str, str]]):
+        """Encrypt and insert OAuth token rows; runs in a worker thread"""
         
         # Calculate expiration (usually 1 hour for access tokens)
         expires_at = int(time.time()) + 3600
         
-        c.execute('''INSERT INTO oauth_tokens 
-                  (user_id, exchange_name, access_token_encrypted, refresh_token_encrypted, expires_at) 
-                  VALUES (?, ?, ?, ?, ?)''',
-                  (user_id, exchange, encrypted_access, encrypted_refresh, expires_at))
+        encrypted = _encrypt_many(self.cipher_suite, [
+            token
+            for _, _, access_token, refresh_token in rows
+            for token in (access_token, refresh_token or None)
+        ])
+        params = [
+            (user_id, exchange, encrypted[2 * i], encrypted[2 * i + 1], expires_at)
+            for i, (user_id, exchange, _, _) in enumerate(rows)
+        ]
         
-        conn.commit()
-        conn.close()
+        with self._conn_lock:
+            _executemany(self._get_conn(), SQL_INSERT_OAUTH_TOKEN, params)
 
 class AutoAPIKeyGenerator:
     """Generate API keys programmatically for supported exchanges"""
     
     def __init__(self, encryption_key: bytes):
         self.cipher_suite = Fernet(encryption_key)
+        self._conn = None
+        self._conn_lock = threading.RLock()  # also serializes writes from worker threads
+        self._http: Optional[aiohttp.ClientSession] = None
+    
+    def _get_conn(self) -> sqlite3.Connection:
+        """Return the shared database connection, opening it on first use"""
+        with self._conn_lock:
+            if self._conn is None:
+                self._conn = _open_db()
+            return self._conn
+    
+    async def _get_http(self) -> aiohttp.ClientSession:
+        """Return the shared keep-alive HTTP session, creating it on first use"""
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession()
+        return self._http
+    
+    async def close(self):
+        """Close the HTTP session"""
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
     
     async def create_binance_api_key(self, master_key: str, master_secret: str, user_id: int) -> Dict:
         """Create sub-account API key for Binance (requires master account)"""
@@ -261,12 +378,10 @@ class AutoAPIKeyGenerator:
             }
             
             # Create signature
-            param_str = '&'.join([f"{k}={v}" for k, v in sorted(params.items())])
-            signature = hmac.new(
-                master_secret.encode('utf-8'),
-                param_str.encode('utf-8'),
-                hashlib.sha256
-            ).hexdigest()
+            param_str = '&'.join(f"{k}={params[k]}" for k in _BYBIT_SIG_KEYS)
+            signer = _hmac_template(master_secret.encode('utf-8'), hashlib.sha256).copy()
+            signer.update(param_str.encode('utf-8'))
+            signature = signer.hexdigest()
             
             headers = {
                 'X-BAPI-API-KEY': master_key,
@@ -275,23 +390,23 @@ class AutoAPIKeyGenerator:
                 'Content-Type': 'application/json'
             }
             
-            response = requests.post(url, json=params, headers=headers)
+            http = await self._get_http()
+            async with http.post(url, json=params, headers=headers) as response:
+                result = await response.json(content_type=None) if response.status == 200 else None
             
-            if response.status_code == 200:
-                result = response.json()
-                if result['retCode'] == 0:
-                    api_data = result['result']
-                    api_key = api_data['apiKey']
-                    secret = api_data['secret']
-                    
-                    await self._store_generated_keys(user_id, 'bybit', api_key, secret)
-                    
-                    return {
-                        'success': True,
-                        'exchange': 'bybit',
-                        'api_key': api_key,
-                        'message': 'Bybit API key created successfully'
-                    }
+            if result and result['retCode'] == 0:
+                api_data = result['result']
+                api_key = api_data['apiKey']
+                secret = api_data['secret']
+                
+                await self._store_generated_keys(user_id, 'bybit', api_key, secret)
+                
+                return {
+                    'success': True,
+                    'exchange': 'bybit',
+                    'api_key': api_key,
+                    'message': 'Bybit API key created successfully'
+                }
             
             return {
                 'success': False,
@@ -306,21 +421,27 @@ class AutoAPIKeyGenerator:
     
     async def _store_generated_keys(self, user_id: int, exchange: str, api_key: str, secret: str, passphrase: str = ''):
         """Store generated API keys in database"""
+        await self._store_generated_keys_bulk([(user_id, exchange, api_key, secret, passphrase)])
+    
+    async def _store_generated_keys_bulk(self, rows: List[Tuple[int, str, str, str, str]]):
+        """Store (user_id, exchange, api_key, secret, passphrase) rows in one transaction"""
+        await asyncio.to_thread(self._store_generated_keys_sync, rows)
+    
+    def _store_generated_keys_sync(self, rows: List[Tuple[int, str, str, str, str]]):
+        """Encrypt and insert generated key rows; runs in a worker thread"""
         
-        encrypted_key = self.cipher_suite.encrypt(api_key.encode())
-        encrypted_secret = self.cipher_suite.encrypt(secret.encode())
-        encrypted_passphrase = self.cipher_suite.encrypt(passphrase.encode()) if passphrase else b''
-        
-        conn = sqlite3.connect('trading_bot.db')
-        c = conn.cursor()
-        
-        c.execute('''INSERT INTO exchanges 
-                  (user_id, exchange_name, api_key_encrypted, api_secret_encrypted, passphrase_encrypted) 
-                  VALUES (?, ?, ?, ?, ?)''',
-                  (user_id, exchange, encrypted_key, encrypted_secret, encrypted_passphrase))
+        encrypted = _encrypt_many(self.cipher_suite, [
+            value
+            for _, _, api_key, secret, passphrase in rows
+            for value in (api_key, secret, passphrase or None)
+        ])
+        params = [
+            (user_id, exchange, *encrypted[3 * i:3 * i + 3])
+            for i, (user_id, exchange, _, _, _) in enumerate(rows)
+        ]
         
-        conn.commit()
-        conn.close()
+        with self._conn_lock:
+            _executemany(self._get_conn(), SQL_INSERT_EXCHANGE_KEYS, params)
 
 # Integration with main bot
 class EnhancedExchangeConnector:
@@ -379,6 +500,11 @@ class EnhancedExchangeConnector:
     async def handle_oauth_return(self, code: str, state: str) -> Dict:
         """Handle OAuth callback"""
         return await self.auth_manager.handle_oauth_callback(code, state)
+    
+    async def close(self):
+        """Close the HTTP sessions held by the auth helpers"""
+        await self.auth_manager.close()
+        await self.api_generator.close()
 
 # Usage example functions
 async def demo_oauth_flow():
@@ -416,8 +542,6 @@ async def demo_auto_api_generation():
         print(f"Error: {result['error']}")
 
 if __name__ == "__main__":
-    import asyncio
-    
     print("OAuth Flow Demo:")
     asyncio.run(demo_oauth_flow())
     
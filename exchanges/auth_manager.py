@@ -4,59 +4,220 @@ import hmac
 import hashlib
 import base64
 import secrets
-from typing import Dict, Optional, Tuple
+import heapq
+import struct
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlencode
 from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import os
-import requests
+import aiohttp
 import sqlite3
 import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
+DB_PATH = 'data/trading_bot.db'
+
+# Shared statement text so every call hits the connection's statement cache
+SQL_UPSERT_OAUTH_TOKEN = '''INSERT INTO oauth_tokens 
+    (user_id, exchange_name, access_token_encrypted, refresh_token_encrypted, expires_at) 
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(user_id, exchange_name) DO UPDATE SET
+        access_token_encrypted = excluded.access_token_encrypted,
+        refresh_token_encrypted = excluded.refresh_token_encrypted,
+        expires_at = excluded.expires_at'''
+SQL_UPDATE_OAUTH_TOKEN = '''UPDATE oauth_tokens 
+    SET access_token_encrypted = ?, refresh_token_encrypted = ?, expires_at = ?
+    WHERE user_id = ? AND exchange_name = ?'''
+SQL_GET_REFRESH_TOKEN = '''SELECT refresh_token_encrypted FROM oauth_tokens 
+    WHERE user_id = ? AND exchange_name = ?'''
+# The ciphertext is only returned while the token is still valid; expired rows yield NULL
+SQL_GET_ACCESS_TOKEN = '''SELECT CASE WHEN expires_at > ? THEN access_token_encrypted END, expires_at
+    FROM oauth_tokens WHERE user_id = ? AND exchange_name = ?'''
+SQL_DELETE_DEAD_OAUTH_TOKENS = '''DELETE FROM oauth_tokens WHERE expires_at < ?
+    AND (refresh_token_encrypted IS NULL OR length(refresh_token_encrypted) = 0)'''
+
+KDF_SALT = b'trading_bot_salt'  # Fixed salt
+KDF_ITERATIONS = 100000
+
+# PBKDF2 output per password, so every manager built in this process derives the key only once
+_DERIVED_KEY_CACHE: Dict[bytes, bytes] = {}
+
+# Cached access tokens are served until this many seconds before they expire
+TOKEN_CACHE_MARGIN = 30
+
+STATE_TOKEN_TTL = 600  # 10 minutes
+
+# State payload: user_id, issued_at, expires_at, 16-char nonce; the exchange name follows
+_STATE_HEADER = struct.Struct('!qII16s')
+
+# Bound once so the state-token and token-cache paths skip the module attribute lookups
+_b64encode = base64.urlsafe_b64encode
+_b64decode = base64.urlsafe_b64decode
+_now = time.time
+
+JANITOR_INTERVAL = 300  # 5 minutes
+
+# Token requests are retried, backing off 0.2s, 0.4s, ..., only when the provider cannot have acted on them:
+# it refused them outright (these statuses) or the connection was never made. Authorization codes and
+# refresh tokens are single-use, so a request that may have been processed is never sent twice.
+TOKEN_REQUEST_ATTEMPTS = 3
+TOKEN_RETRY_BASE_DELAY = 0.2
+_RETRY_STATUSES = frozenset({429, 503})
+
+# exchange -> (token URL, client ID env var, client secret env var, display name)
+_OAUTH_ENDPOINTS = {
+    'kucoin': ('https://api.kucoin.com/oauth/token', 'KUCOIN_CLIENT_ID', 'KUCOIN_CLIENT_SECRET', 'KuCoin'),
+    'bybit': ('https://api.bybit.com/oauth/token', 'BYBIT_CLIENT_ID', 'BYBIT_CLIENT_SECRET', 'Bybit'),
+    'okx': ('https://www.okx.com/oauth/token', 'OKX_CLIENT_ID', 'OKX_CLIENT_SECRET', 'OKX'),
+}
+
 class ExchangeAuthManager:
     def __init__(self, encryption_key: str):
         """Initialize with encryption key"""
         self.fernet = self._setup_encryption(encryption_key)
-        self.auth_sessions = {}
+        # State tokens are signed rather than stored; only consumed nonces are remembered until they expire
+        self._state_secret = hashlib.sha256(self.fernet._signing_key).digest()
+        self._consumed_states: Dict[str, int] = {}  # nonce -> expires_at
+        self._expiry_heap: List[Tuple[int, str]] = []  # (expires_at, nonce), earliest first
+        self._http: Optional[aiohttp.ClientSession] = None
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = asyncio.Lock()
+        self._token_cache: Dict[Tuple[int, str], Tuple[str, int]] = {}  # (user_id, exchange) -> (token, expires_at)
+        self._janitor_task: Optional[asyncio.Task] = None
+        self._client_credentials = {
+            exchange: (os.getenv(client_id), os.getenv(client_secret))
+            for exchange, (_, client_id, client_secret, _) in _OAUTH_ENDPOINTS.items()
+        }
+        self._callback_url = os.getenv('OAUTH_CALLBACK_URL')
+    
+    def _get_db(self) -> sqlite3.Connection:
+        """Return the shared autocommit database connection, opening it in WAL mode on first use"""
+        if self._db is None:
+            db = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None,
+                                 cached_statements=256)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._ensure_schema(db)
+            self._db = db
+        return self._db
+    
+    def _ensure_schema(self, db: sqlite3.Connection):
+        """Create oauth_tokens with one row per user and exchange"""
+        db.execute('''CREATE TABLE IF NOT EXISTS oauth_tokens (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER,
+            exchange_name TEXT,
+            access_token_encrypted BLOB,
+            refresh_token_encrypted BLOB,
+            expires_at INTEGER,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )''')
+        
+        # Older databases got a new row per reconnection; keep only the latest before enforcing uniqueness
+        db.execute('''DELETE FROM oauth_tokens WHERE id NOT IN (
+            SELECT MAX(id) FROM oauth_tokens GROUP BY user_id, exchange_name
+        )''')
+        db.execute('''CREATE UNIQUE INDEX IF NOT EXISTS idx_oauth_tokens_user_exchange
+                      ON oauth_tokens(user_id, exchange_name)''')
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared keep-alive HTTP session, creating it on first use"""
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=0, limit_per_host=100, ttl_dns_cache=300)
+            )
+        return self._http
+    
+    async def start(self):
+        """Start the background sweep of consumed state nonces and dead OAuth tokens"""
+        if self._janitor_task is None or self._janitor_task.done():
+            self._janitor_task = asyncio.create_task(self._janitor())
+    
+    async def _janitor(self):
+        """Every JANITOR_INTERVAL seconds, prune expired nonces and expired tokens that cannot be refreshed"""
+        while True:
+            await asyncio.sleep(JANITOR_INTERVAL)
+            try:
+                self.cleanup_expired_sessions()
+                async with self._db_lock:
+                    await asyncio.to_thread(
+                        self._get_db().execute,
+                        SQL_DELETE_DEAD_OAUTH_TOKENS,
+                        (int(time.time()),)
+                    )
+            except Exception as e:
+                logger.error(f"OAuth janitor error: {e}")
+    
+    async def close(self):
+        """Stop the background sweep and close the HTTP session"""
+        if self._janitor_task is not None:
+            self._janitor_task.cancel()
+            self._janitor_task = None
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+    
+    async def _post_token_request(self, token_url: str, data: Dict, failure: str) -> Dict:
+        """POST an OAuth token request and return the JSON body, raising on non-200
+        
+        Rate limits, 503s and failed connects are retried with exponential backoff so a
+        transient failure does not send the user back through the browser flow.
+        """
+        # requests used to drop unset fields; aiohttp would send them as "None"
+        data = {k: v for k, v in data.items() if v is not None}
+        
+        session = await self._get_session()
+        for attempt in range(TOKEN_REQUEST_ATTEMPTS):
+            last_attempt = attempt == TOKEN_REQUEST_ATTEMPTS - 1
+            try:
+                async with session.post(token_url, data=data) as response:
+                    if response.status == 200:
+                        return await response.json(content_type=None)
+                    if last_attempt or response.status not in _RETRY_STATUSES:
+                        raise Exception(f"{failure}: {await response.text()}")
+            except aiohttp.ClientConnectorError:
+                if last_attempt:
+                    raise
+            await asyncio.sleep(TOKEN_RETRY_BASE_DELAY * 2 ** attempt)
     
     def _setup_encryption(self, key: str) -> Fernet:
         """Set up encryption with key derivation"""
         try:
-            # Use key derivation to get a proper length key
-            salt = b'trading_bot_salt'  # Fixed salt
-            kdf = PBKDF2HMAC(
-                algorithm=hashes.SHA256(),
-                length=32,
-                salt=salt,
-                iterations=100000,
-            )
-            derived_key = base64.urlsafe_b64encode(kdf.derive(key.encode()))
+            cache_key = hashlib.sha256(key.encode() + KDF_SALT + str(KDF_ITERATIONS).encode()).digest()
+            derived_key = _DERIVED_KEY_CACHE.get(cache_key)
+            if derived_key is None:
+                # Use key derivation to get a proper length key
+                derived_key = base64.urlsafe_b64encode(
+                    hashlib.pbkdf2_hmac('sha256', key.encode(), KDF_SALT, KDF_ITERATIONS, dklen=32)
+                )
+                _DERIVED_KEY_CACHE[cache_key] = derived_key
             return Fernet(derived_key)
         except Exception as e:
             logger.error(f"Encryption setup error: {e}")
             raise
     
     def encrypt_credentials(self, api_key: str, api_secret: str, 
-                           passphrase: str = '') -> Tuple[bytes, bytes, bytes]:
-        """Encrypt API credentials"""
+                           passphrase: str = '') -> bytes:
+        """Encrypt API credentials into a single Fernet payload"""
         try:
-            encrypted_key = self.fernet.encrypt(api_key.encode())
-            encrypted_secret = self.fernet.encrypt(api_secret.encode())
-            encrypted_passphrase = self.fernet.encrypt(passphrase.encode()) if passphrase else b''
-            
-            return encrypted_key, encrypted_secret, encrypted_passphrase
+            payload = json.dumps({'k': api_key, 's': api_secret, 'p': passphrase}, separators=(',', ':'))
+            return self.fernet.encrypt(payload.encode())
         except Exception as e:
             logger.error(f"Encryption error: {e}")
             raise
     
-    def decrypt_credentials(self, encrypted_key: bytes, encrypted_secret: bytes,
+    def decrypt_credentials(self, encrypted_key: bytes, encrypted_secret: bytes = b'',
                            encrypted_passphrase: bytes = b'') -> Tuple[str, str, str]:
         """Decrypt API credentials"""
         try:
+            # Single-payload rows leave the secret column empty; older rows hold one token per field
+            if not encrypted_secret:
+                credentials = json.loads(self.fernet.decrypt(encrypted_key))
+                return credentials['k'], credentials['s'], credentials['p']
+            
             api_key = self.fernet.decrypt(encrypted_key).decode()
             api_secret = self.fernet.decrypt(encrypted_secret).decode()
             passphrase = self.fernet.decrypt(encrypted_passphrase).decode() if encrypted_passphrase else ''
@@ -90,159 +251,99 @@ class ExchangeAuthManager:
     
     def _generate_state_token(self, user_id: int, exchange: str) -> str:
         """Generate secure state token for OAuth"""
-        state_data = {
-            'user_id': user_id,
-            'exchange': exchange,
-            'timestamp': int(time.time()),
-            'nonce': secrets.token_hex(16)
-        }
+        now = int(_now())
+        nonce = secrets.token_urlsafe(12).encode()
+        state_data = _STATE_HEADER.pack(user_id, now, now + STATE_TOKEN_TTL, nonce) + exchange.encode()
         
-        state_json = json.dumps(state_data)
-        state_token = base64.urlsafe_b64encode(state_json.encode()).decode()
+        payload = _b64encode(state_data)
+        signature = _b64encode(self._sign_state(payload))
         
-        # Store in temporary session (expires in 10 minutes)
-        self.auth_sessions[state_token] = {
-            **state_data,
-            'expires_at': int(time.time()) + 600
-        }
-        
-        return state_token
+        return f"{payload.decode()}.{signature.decode()}"
+    
+    def _sign_state(self, payload: bytes) -> bytes:
+        """HMAC-SHA256 of a state payload under the server secret"""
+        return hmac.new(self._state_secret, payload, hashlib.sha256).digest()
     
     def validate_state_token(self, state: str) -> Optional[Dict]:
         """Validate and return state token data"""
-        if state not in self.auth_sessions:
+        try:
+            payload, signature = state.encode().split(b'.')
+            if not hmac.compare_digest(_b64decode(signature), self._sign_state(payload)):
+                return None
+            state_data = _b64decode(payload)
+            user_id, issued_at, expires_at, nonce = _STATE_HEADER.unpack_from(state_data)
+            exchange = state_data[_STATE_HEADER.size:].decode()
+            nonce = nonce.decode()
+        except (ValueError, TypeError, struct.error):
             return None
         
-        session_data = self.auth_sessions[state]
-        
-        # Check if expired
-        if int(time.time()) > session_data['expires_at']:
-            self.auth_sessions.pop(state, None)
+        # Check if expired or already used
+        if int(_now()) > expires_at or nonce in self._consumed_states:
             return None
         
-        return session_data
+        return {
+            'user_id': user_id,
+            'exchange': exchange,
+            'timestamp': issued_at,
+            'nonce': nonce,
+            'expires_at': expires_at
+        }
     
     def cleanup_expired_sessions(self):
-        """Clean up expired auth sessions"""
+        """Forget consumed state nonces that have expired and can no longer be replayed"""
         current_time = int(time.time())
-        expired_sessions = [
-            state for state, data in self.auth_sessions.items()
-            if current_time > data['expires_at']
-        ]
-        
-        for state in expired_sessions:
-            self.auth_sessions.pop(state, None)
+        while self._expiry_heap and self._expiry_heap[0][0] < current_time:
+            _, nonce = heapq.heappop(self._expiry_heap)
+            self._consumed_states.pop(nonce, None)
+    
+    def _consume_state(self, nonce: str, expires_at: int):
+        """Record a state nonce as used, sweeping expired ones every 256 entries"""
+        self._consumed_states[nonce] = expires_at
+        heapq.heappush(self._expiry_heap, (expires_at, nonce))
+        if len(self._consumed_states) % 256 == 0:
+            self.cleanup_expired_sessions()
 
     async def handle_oauth_callback(self, code: str, state: str) -> Dict:
         """Handle OAuth callback and exchange code for tokens"""
         
-        if state not in self.auth_sessions:
+        session_data = self.validate_state_token(state)
+        if session_data is None:
             raise ValueError("Invalid or expired state token")
         
-        session_data = self.auth_sessions[state]
-        exchange = session_data['exchange']
-        user_id = session_data['user_id']
+        # Consume before the first await so a concurrent callback with the same state is rejected
+        self._consume_state(session_data['nonce'], session_data['expires_at'])
         
-        try:
-            if exchange == 'kucoin':
-                return await self._kucoin_exchange_code(code, user_id)
-            elif exchange == 'bybit':
-                return await self._bybit_exchange_code(code, user_id)
-            elif exchange == 'okx':
-                return await self._okx_exchange_code(code, user_id)
-            else:
-                raise ValueError(f"OAuth not supported for {exchange}")
-        finally:
-            # Clean up session
-            self.auth_sessions.pop(state, None)
+        return await self._exchange_code(session_data['exchange'], code, session_data['user_id'])
 
-    async def _kucoin_exchange_code(self, code: str, user_id: int) -> Dict:
-        """Exchange authorization code for KuCoin access token"""
+    async def _exchange_code(self, exchange: str, code: str, user_id: int) -> Dict:
+        """Exchange authorization code for an access token"""
         
-        token_url = "https://api.kucoin.com/oauth/token"
+        if exchange not in _OAUTH_ENDPOINTS:
+            raise ValueError(f"OAuth not supported for {exchange}")
+        
+        token_url, _, _, display_name = _OAUTH_ENDPOINTS[exchange]
+        client_id, client_secret = self._client_credentials[exchange]
         data = {
             'grant_type': 'authorization_code',
-            'client_id': os.getenv('KUCOIN_CLIENT_ID'),
-            'client_secret': os.getenv('KUCOIN_CLIENT_SECRET'),
+            'client_id': client_id,
+            'client_secret': client_secret,
             'code': code,
-            'redirect_uri': os.getenv('OAUTH_CALLBACK_URL')
+            'redirect_uri': self._callback_url
         }
         
-        response = requests.post(token_url, data=data)
-        if response.status_code == 200:
-            token_data = response.json()
-            
-            # Store encrypted tokens
-            access_token = token_data['access_token']
-            refresh_token = token_data.get('refresh_token', '')
-            
-            await self._store_oauth_tokens(user_id, 'kucoin', access_token, refresh_token)
-            
-            return {
-                'success': True,
-                'exchange': 'kucoin',
-                'message': 'KuCoin connected successfully via OAuth'
-            }
-        else:
-            raise Exception(f"Token exchange failed: {response.text}")
-
-    async def _bybit_exchange_code(self, code: str, user_id: int) -> Dict:
-        """Exchange authorization code for Bybit access token"""
+        token_data = await self._post_token_request(token_url, data, "Token exchange failed")
         
-        token_url = "https://api.bybit.com/oauth/token"
-        data = {
-            'grant_type': 'authorization_code',
-            'client_id': os.getenv('BYBIT_CLIENT_ID'),
-            'client_secret': os.getenv('BYBIT_CLIENT_SECRET'),
-            'code': code,
-            'redirect_uri': os.getenv('OAUTH_CALLBACK_URL')
-        }
+        # Store encrypted tokens
+        access_token = token_data['access_token']
+        refresh_token = token_data.get('refresh_token', '')
         
-        response = requests.post(token_url, data=data)
-        if response.status_code == 200:
-            token_data = response.json()
-            
-            access_token = token_data['access_token']
-            refresh_token = token_data.get('refresh_token', '')
-            
-            await self._store_oauth_tokens(user_id, 'bybit', access_token, refresh_token)
-            
-            return {
-                'success': True,
-                'exchange': 'bybit',
-                'message': 'Bybit connected successfully via OAuth'
-            }
-        else:
-            raise Exception(f"Token exchange failed: {response.text}")
-
-    async def _okx_exchange_code(self, code: str, user_id: int) -> Dict:
-        """Exchange authorization code for OKX access token"""
+        await self._store_oauth_tokens(user_id, exchange, access_token, refresh_token)
         
-        token_url = "https://www.okx.com/oauth/token"
-        data = {
-            'grant_type': 'authorization_code',
-            'client_id': os.getenv('OKX_CLIENT_ID'),
-            'client_secret': os.getenv('OKX_CLIENT_SECRET'),
-            'code': code,
-            'redirect_uri': os.getenv('OAUTH_CALLBACK_URL')
+        return {
+            'success': True,
+            'exchange': exchange,
+            'message': f'{display_name} connected successfully via OAuth'
         }
-        
-        response = requests.post(token_url, data=data)
-        if response.status_code == 200:
-            token_data = response.json()
-            
-            access_token = token_data['access_token']
-            refresh_token = token_data.get('refresh_token', '')
-            
-            await self._store_oauth_tokens(user_id, 'okx', access_token, refresh_token)
-            
-            return {
-                'success': True,
-                'exchange': 'okx',
-                'message': 'OKX connected successfully via OAuth'
-            }
-        else:
-            raise Exception(f"Token exchange failed: {response.text}")
 
     async def _store_oauth_tokens(self, user_id: int, exchange: str, access_token: str, refresh_token: str = ''):
         """Store OAuth tokens securely in database"""
@@ -250,162 +351,114 @@ class ExchangeAuthManager:
         encrypted_access = self.fernet.encrypt(access_token.encode())
         encrypted_refresh = self.fernet.encrypt(refresh_token.encode()) if refresh_token else b''
         
-        conn = sqlite3.connect('data/trading_bot.db')
-        c = conn.cursor()
-        
-        # Create OAuth tokens table if not exists
-        c.execute('''CREATE TABLE IF NOT EXISTS oauth_tokens (
-            id INTEGER PRIMARY KEY,
-            user_id INTEGER,
-            exchange_name TEXT,
-            access_token_encrypted TEXT,
-            refresh_token_encrypted TEXT,
-            expires_at INTEGER,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )''')
-        
         # Calculate expiration (usually 1 hour for access tokens)
         expires_at = int(time.time()) + 3600
         
-        c.execute('''INSERT INTO oauth_tokens 
-                  (user_id, exchange_name, access_token_encrypted, refresh_token_encrypted, expires_at) 
-                  VALUES (?, ?, ?, ?, ?)''',
-                  (user_id, exchange, encrypted_access, encrypted_refresh, expires_at))
-        
-        conn.commit()
-        conn.close()
+        async with self._db_lock:
+            self._get_db().execute(SQL_UPSERT_OAUTH_TOKEN,
+                      (user_id, exchange, encrypted_access, encrypted_refresh, expires_at))
+        self._token_cache.pop((user_id, exchange), None)
 
     async def refresh_oauth_token(self, user_id: int, exchange: str) -> bool:
         """Refresh OAuth token for a user and exchange"""
-        
-        conn = sqlite3.connect('data/trading_bot.db')
-        c = conn.cursor()
-        
-        # Get refresh token
-        c.execute('''SELECT refresh_token_encrypted FROM oauth_tokens 
-                     WHERE user_id = ? AND exchange_name = ?''', (user_id, exchange))
-        result = c.fetchone()
-        
-        if not result or not result[0]:
-            conn.close()
-            return False
-        
-        refresh_token = self.fernet.decrypt(result[0]).decode()
-        
-        try:
-            if exchange == 'kucoin':
-                new_tokens = await self._refresh_kucoin_token(refresh_token)
-            elif exchange == 'bybit':
-                new_tokens = await self._refresh_bybit_token(refresh_token)
-            elif exchange == 'okx':
-                new_tokens = await self._refresh_okx_token(refresh_token)
-            else:
-                conn.close()
-                return False
-            
-            # Update tokens in database
-            encrypted_access = self.fernet.encrypt(new_tokens['access_token'].encode())
-            encrypted_refresh = self.fernet.encrypt(new_tokens.get('refresh_token', refresh_token).encode())
-            expires_at = int(time.time()) + 3600
-            
-            c.execute('''UPDATE oauth_tokens 
-                         SET access_token_encrypted = ?, refresh_token_encrypted = ?, expires_at = ?
-                         WHERE user_id = ? AND exchange_name = ?''',
-                      (encrypted_access, encrypted_refresh, expires_at, user_id, exchange))
-            
-            conn.commit()
-            conn.close()
-            return True
-            
-        except Exception as e:
-            conn.close()
-            return False
+        results = await self.refresh_many([(user_id, exchange)])
+        return results[(user_id, exchange)]
 
-    async def _refresh_kucoin_token(self, refresh_token: str) -> Dict:
-        """Refresh KuCoin OAuth token"""
+    async def refresh_many(self, user_exchange_pairs: List[Tuple[int, str]]) -> Dict[Tuple[int, str], bool]:
+        """Refresh OAuth tokens for many users concurrently and write them back in one transaction"""
+        
+        results = {pair: False for pair in user_exchange_pairs}
+        db = self._get_db()
+        
+        # Get refresh tokens
+        pending = []
+        for user_id, exchange in results:
+            if exchange not in _OAUTH_ENDPOINTS:
+                continue
+            result = db.execute(SQL_GET_REFRESH_TOKEN, (user_id, exchange)).fetchone()
+            if not result or not result[0]:
+                continue
+            try:
+                pending.append((user_id, exchange, self.fernet.decrypt(result[0]).decode()))
+            except Exception as e:
+                logger.error(f"Refresh token decryption error for user {user_id} on {exchange}: {e}")
+        
+        if not pending:
+            return results
+        
+        responses = await asyncio.gather(
+            *(self._refresh_token(exchange, refresh_token) for _, exchange, refresh_token in pending),
+            return_exceptions=True
+        )
         
-        token_url = "https://api.kucoin.com/oauth/token"
-        data = {
-            'grant_type': 'refresh_token',
-            'client_id': os.getenv('KUCOIN_CLIENT_ID'),
-            'client_secret': os.getenv('KUCOIN_CLIENT_SECRET'),
-            'refresh_token': refresh_token
-        }
-        
-        response = requests.post(token_url, data=data)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"Token refresh failed: {response.text}")
-
-    async def _refresh_bybit_token(self, refresh_token: str) -> Dict:
-        """Refresh Bybit OAuth token"""
-        
-        token_url = "https://api.bybit.com/oauth/token"
-        data = {
-            'grant_type': 'refresh_token',
-            'client_id': os.getenv('BYBIT_CLIENT_ID'),
-            'client_secret': os.getenv('BYBIT_CLIENT_SECRET'),
-            'refresh_token': refresh_token
-        }
-        
-        response = requests.post(token_url, data=data)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"Token refresh failed: {response.text}")
+        expires_at = int(time.time()) + 3600
+        rows = []
+        refreshed = []
+        for (user_id, exchange, refresh_token), new_tokens in zip(pending, responses):
+            if isinstance(new_tokens, Exception) or 'access_token' not in new_tokens:
+                continue
+            access_token = new_tokens['access_token']
+            encrypted_access = self.fernet.encrypt(access_token.encode())
+            encrypted_refresh = self.fernet.encrypt(new_tokens.get('refresh_token', refresh_token).encode())
+            rows.append((encrypted_access, encrypted_refresh, expires_at, user_id, exchange))
+            refreshed.append((user_id, exchange, access_token))
+        
+        if not rows:
+            return results
+        
+        # Update tokens in database
+        async with self._db_lock:
+            db.execute('BEGIN')
+            try:
+                db.executemany(SQL_UPDATE_OAUTH_TOKEN, rows)
+            except Exception as e:
+                db.execute('ROLLBACK')
+                logger.error(f"OAuth token update error: {e}")
+                return results
+            db.execute('COMMIT')
+        
+        for user_id, exchange, access_token in refreshed:
+            self._token_cache[(user_id, exchange)] = (access_token, expires_at)
+            results[(user_id, exchange)] = True
+        return results
 
-    async def _refresh_okx_token(self, refresh_token: str) -> Dict:
-        """Refresh OKX OAuth token"""
+    async def _refresh_token(self, exchange: str, refresh_token: str) -> Dict:
+        """Refresh an OAuth token"""
         
-        token_url = "https://www.okx.com/oauth/token"
+        token_url = _OAUTH_ENDPOINTS[exchange][0]
+        client_id, client_secret = self._client_credentials[exchange]
         data = {
             'grant_type': 'refresh_token',
-            'client_id': os.getenv('OKX_CLIENT_ID'),
-            'client_secret': os.getenv('OKX_CLIENT_SECRET'),
+            'client_id': client_id,
+            'client_secret': client_secret,
             'refresh_token': refresh_token
         }
         
-        response = requests.post(token_url, data=data)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"Token refresh failed: {response.text}")
+        return await self._post_token_request(token_url, data, "Token refresh failed")
 
-    def get_oauth_token(self, user_id: int, exchange: str) -> Optional[str]:
+    async def get_oauth_token(self, user_id: int, exchange: str) -> Optional[str]:
         """Get valid OAuth token for user and exchange"""
         
-        conn = sqlite3.connect('data/trading_bot.db')
-        c = conn.cursor()
+        cached = self._token_cache.get((user_id, exchange))
+        if cached and cached[1] - _now() > TOKEN_CACHE_MARGIN:
+            return cached[0]
         
-        c.execute('''SELECT access_token_encrypted, expires_at FROM oauth_tokens 
-                     WHERE user_id = ? AND exchange_name = ?''', (user_id, exchange))
-        result = c.fetchone()
-        conn.close()
+        result = self._get_db().execute(
+            SQL_GET_ACCESS_TOKEN, (int(_now()), user_id, exchange)
+        ).fetchone()
         
         if not result:
             return None
         
         access_token_encrypted, expires_at = result
         
-        # Check if token is expired
-        if int(time.time()) >= expires_at:
-            # Try to refresh token
-            if asyncio.run(self.refresh_oauth_token(user_id, exchange)):
-                # Get new token
-                conn = sqlite3.connect('data/trading_bot.db')
-                c = conn.cursor()
-                c.execute('''SELECT access_token_encrypted FROM oauth_tokens 
-                             WHERE user_id = ? AND exchange_name = ?''', (user_id, exchange))
-                result = c.fetchone()
-                conn.close()
-                
-                if result:
-                    access_token_encrypted = result[0]
-                else:
-                    return None
-            else:
+        # Expired token: nothing was fetched to decrypt, and a successful refresh caches the new one
+        if access_token_encrypted is None:
+            if not await self.refresh_oauth_token(user_id, exchange):
                 return None
+            cached = self._token_cache.get((user_id, exchange))
+            return cached[0] if cached else None
         
-        return self.fernet.decrypt(access_token_encrypted).decode()
+        access_token = self.fernet.decrypt(access_token_encrypted).decode()
+        self._token_cache[(user_id, exchange)] = (access_token, expires_at)
+        return access_token
@@ -1,75 +1,256 @@
 import asyncio
-import requests
+import aiohttp
 import time
 import hmac
 import hashlib
 import base64
 import json
 import logging
-import ccxt
-from typing import Dict, Any, Optional
+import ccxt.async_support as ccxt
+from typing import Dict, Any, List, Optional, Tuple
 from urllib.parse import urlencode
+from collections import OrderedDict
+from functools import lru_cache
+from config.settings import Config
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
+# Each exchange gets its own session rooted at its API host, so its warm connections are never evicted by another's
+BASE_URLS = {
+    'binance': 'https://fapi.binance.com',
+    'bybit': 'https://api.bybit.com',
+    'okx': 'https://www.okx.com',
+    'bitget': 'https://api.bitget.com',
+    'mexc': 'https://contract.mexc.com',
+    'kucoin': 'https://api-futures.kucoin.com',
+    'gate': 'https://api.gateio.ws',
+    'huobi': 'https://api.hbdm.com',
+    'bingx': 'https://open-api.bingx.com',
+    'binance_stream': 'wss://fstream.binance.com',
+}
+
+# Binance closes a user-data stream whose listen key is not renewed within 60 minutes
+LISTEN_KEY_RENEW_INTERVAL = 1800
+# Reconnects back off from 5s up to 5 minutes; a rejected key stops its stream for good
+STREAM_RECONNECT_DELAY = 5
+STREAM_MAX_RECONNECT_DELAY = 300
+# Streams are dropped after an hour without a balance lookup, and at most this many stay open
+STREAM_IDLE_TIMEOUT = 3600
+MAX_BALANCE_STREAMS = 200
+# Binance error codes for an invalid, revoked or unauthorised API key
+_BINANCE_KEY_REJECTED = frozenset({-2014, -2015})
+
+@lru_cache(maxsize=1024)
+def _hmac_template(key: bytes, digestmod) -> hmac.HMAC:
+    """Keyed HMAC state for a secret; copies of it skip the per-request key setup"""
+    return hmac.new(key, digestmod=digestmod)
+
+def _sign(api_secret: str, message: bytes, digestmod=hashlib.sha256) -> hmac.HMAC:
+    """HMAC of message under api_secret, starting from a cached copy of the keyed state"""
+    template = _hmac_template(api_secret.encode('utf-8'), digestmod)
+    signer = template.copy()
+    signer.update(message)
+    return signer
+
+@lru_cache(maxsize=1024)
+def _kucoin_passphrase(api_secret: str, passphrase: str) -> str:
+    """KuCoin v2 key passphrase header: base64 HMAC of the passphrase, constant for a given key"""
+    return base64.b64encode(_sign(api_secret, passphrase.encode('utf-8')).digest()).decode()
+
+# Fixed parts of the signed strings; only the timestamp (and Huobi's key) vary per request
+_OKX_BALANCE_PATH = '/api/v5/account/balance?ccy=USDT'
+_OKX_SIGN_SUFFIX = b'GET' + _OKX_BALANCE_PATH.encode()
+_KUCOIN_SIGN_SUFFIX = b'GET/api/v1/account-overview'
+_HUOBI_SIGN_PREFIX = b'GET\napi.hbdm.com\n/linear-swap-api/v1/swap_account_info\nAccessKeyId='
+_HUOBI_SIGN_PARAMS = b'&SignatureMethod=HmacSHA256&SignatureVersion=2&Timestamp='
+_BITGET_SIGN_SUFFIX = b'GET/api/mix/v1/account/accounts?productType=umcbl'
+# Gate.io signs method, path, query, SHA-512 of the body and timestamp; a GET has no query or body
+_GATE_SIGN_PREFIX = b'\n'.join((
+    b'GET', b'/api/v4/futures/usdt/accounts', b'', hashlib.sha512(b'').hexdigest().encode(), b''
+))
+
+# (exchange_name, credentials digest) -> (balance, expires_at on the monotonic clock)
+_balance_cache: Dict[Tuple[str, bytes], Tuple[float, float]] = {}
+
+# (exchange_name, credentials digest) -> (ccxt client with markets already loaded, last used on the monotonic clock),
+# for exchanges without a direct fetcher; least recently used first
+_ccxt_clients: 'OrderedDict[Tuple[str, bytes], Tuple[ccxt.Exchange, float]]' = OrderedDict()
+# Clients are closed after 30 minutes unused, and at most this many stay open
+CCXT_CLIENT_IDLE_TIMEOUT = 1800
+MAX_CCXT_CLIENTS = 64
+
+# Binance API key -> live user-data stream holding that account's wallet balance, least recently used first
+_binance_streams: 'OrderedDict[str, BalanceStream]' = OrderedDict()
+
+def _binance_key_rejected(status: int, body: bytes) -> bool:
+    """Whether a Binance error response means the API key itself is no longer accepted"""
+    if status in (401, 403):
+        return True
+    try:
+        return _json_loads(body).get('code') in _BINANCE_KEY_REJECTED
+    except (ValueError, AttributeError):
+        return False
+
+def _credentials_digest(api_key: str, api_secret: str, passphrase: str) -> bytes:
+    """Fixed-size fingerprint of a credential set, so caches never hold the secrets as keys"""
+    return hashlib.blake2b('\0'.join((api_key, api_secret, passphrase)).encode(), digest_size=16).digest()
+
 class BalanceChecker:
+    _sessions: Dict[str, aiohttp.ClientSession] = {}
+    
+    @classmethod
+    async def _session_for(cls, exchange_name: str) -> aiohttp.ClientSession:
+        """Return the keep-alive HTTP session for an exchange's API host, creating it on first use"""
+        session = cls._sessions.get(exchange_name)
+        if session is None or session.closed:
+            # No Accept-Encoding override: aiohttp already asks for gzip/deflate, adds br once Brotli
+            # is installed, and decompresses responses itself
+            session = aiohttp.ClientSession(
+                base_url=BASE_URLS[exchange_name],
+                connector=aiohttp.TCPConnector(limit_per_host=10, ttl_dns_cache=600, keepalive_timeout=75)
+            )
+            cls._sessions[exchange_name] = session
+        return session
+    
+    @classmethod
+    async def close(cls):
+        """Close every exchange HTTP session and cached ccxt client"""
+        sessions = list(cls._sessions.values())
+        cls._sessions.clear()
+        for session in sessions:
+            await session.close()
+        
+        clients = list(_ccxt_clients.values())
+        _ccxt_clients.clear()
+        for client, _ in clients:
+            await client.close()
+        
+        streams = list(_binance_streams.values())
+        _binance_streams.clear()
+        for stream in streams:
+            await stream.stop()
+    
     @staticmethod
     async def get_balance(exchange_name: str, api_key: str, api_secret: str, passphrase: str = '') -> float:
-        """Get USDT futures balance for specified exchange"""
+        """Get USDT futures balance for specified exchange, reusing a result fetched in the last few seconds"""
+        
+        # Key on every credential so a corrected secret is re-checked rather than served from cache
+        key = (exchange_name, _credentials_digest(api_key, api_secret, passphrase))
+        now = time.monotonic()
+        cached = _balance_cache.get(key)
+        if cached and cached[1] > now:
+            return cached[0]
+        
+        balance = await BalanceChecker._fetch_balance(exchange_name, api_key, api_secret, passphrase)
+        # Re-inserted at the end, so entries stay in expiry order and expired ones sit at the front
+        _balance_cache.pop(key, None)
+        _balance_cache[key] = (balance, now + Config.BALANCE_CACHE_TTL)
+        while _balance_cache:
+            oldest = next(iter(_balance_cache))
+            if _balance_cache[oldest][1] > now:
+                break
+            del _balance_cache[oldest]
+        return balance
+    
+    @staticmethod
+    async def get_balances(configs: List[Tuple[str, str, str, str]]) -> List[Any]:
+        """Get balances for several (exchange_name, api_key, api_secret, passphrase) configs concurrently
+        
+        Results line up with configs; a failed lookup leaves its exception in place of the balance.
+        """
+        return await asyncio.gather(
+            *(BalanceChecker.get_balance(*config) for config in configs),
+            return_exceptions=True
+        )
+    
+    @staticmethod
+    async def _fetch_balance(exchange_name: str, api_key: str, api_secret: str, passphrase: str) -> float:
+        """Fetch USDT futures balance from the exchange"""
         
         try:
-            if exchange_name == 'binance':
-                return await BalanceChecker._get_binance_futures_balance(api_key, api_secret)
-            elif exchange_name == 'bybit':
-                return await BalanceChecker._get_bybit_futures_balance(api_key, api_secret)
-            elif exchange_name == 'okx':
-                return await BalanceChecker._get_okx_futures_balance(api_key, api_secret, passphrase)
-            elif exchange_name == 'bitget':
-                return await BalanceChecker._get_bitget_futures_balance(api_key, api_secret, passphrase)
-            elif exchange_name == 'mexc':
-                return await BalanceChecker._get_mexc_futures_balance(api_key, api_secret)
-            elif exchange_name == 'kucoin':
-                return await BalanceChecker._get_kucoin_futures_balance(api_key, api_secret, passphrase)
-            elif exchange_name == 'gate':
-                return await BalanceChecker._get_gate_futures_balance(api_key, api_secret)
-            elif exchange_name == 'huobi':
-                return await BalanceChecker._get_huobi_futures_balance(api_key, api_secret)
-            elif exchange_name == 'bingx':
-                return await BalanceChecker._get_bingx_futures_balance(api_key, api_secret)
-            else:
-                # Initialize exchange
-                exchange_class = getattr(ccxt, exchange_name)
-                exchange_config = {
-                    'apiKey': api_key,
-                    'secret': api_secret,
-                    'enableRateLimit': True,
-                    'options': {
-                        'defaultType': 'future',  # Use futures wallet
-                    }
-                }
-                
-                # Add passphrase if required
-                if passphrase:
-                    exchange_config['password'] = passphrase
-                
-                exchange = exchange_class(exchange_config)
-                
-                # Load markets to ensure proper initialization
-                await exchange.load_markets()
-                
-                # Get balance based on exchange
-                balance = await exchange.fetch_balance()
-                return float(balance.get('total', {}).get('USDT', 0))
+            entry = _DISPATCH.get(exchange_name)
+            if entry:
+                fetch, needs_passphrase = entry
+                if needs_passphrase:
+                    return await fetch(api_key, api_secret, passphrase)
+                return await fetch(api_key, api_secret)
+            
+            exchange = await BalanceChecker._ccxt_client(exchange_name, api_key, api_secret, passphrase)
+            
+            # Get balance based on exchange
+            balance = await exchange.fetch_balance()
+            return float(balance.get('total', {}).get('USDT', 0))
         
         except Exception as e:
             logger.error(f"Error getting balance from {exchange_name}: {e}")
             raise Exception(f"Failed to get {exchange_name} futures balance: {str(e)}")
     
+    @staticmethod
+    async def _ccxt_client(exchange_name: str, api_key: str, api_secret: str, passphrase: str) -> ccxt.Exchange:
+        """Return the cached ccxt client for these credentials, creating it and loading markets on first use"""
+        key = (exchange_name, _credentials_digest(api_key, api_secret, passphrase))
+        now = time.monotonic()
+        cached = _ccxt_clients.get(key)
+        if cached is not None:
+            _ccxt_clients[key] = (cached[0], now)
+            _ccxt_clients.move_to_end(key)
+            return cached[0]
+        
+        # Initialize exchange
+        exchange_class = getattr(ccxt, exchange_name)
+        exchange_config = {
+            'apiKey': api_key,
+            'secret': api_secret,
+            'enableRateLimit': True,
+            'options': {
+                'defaultType': 'future',  # Use futures wallet
+            }
+        }
+        
+        # Add passphrase if required
+        if passphrase:
+            exchange_config['password'] = passphrase
+        
+        exchange = exchange_class(exchange_config)
+        # Published before loading so concurrent callers share one client; ccxt loads markets only once
+        _ccxt_clients[key] = (exchange, now)
+        
+        # Close clients nobody has used for a while, and the least recently used beyond the cap
+        while len(_ccxt_clients) > 1:
+            old_key, (old_client, last_used) = next(iter(_ccxt_clients.items()))
+            if len(_ccxt_clients) <= MAX_CCXT_CLIENTS and now - last_used < CCXT_CLIENT_IDLE_TIMEOUT:
+                break
+            del _ccxt_clients[old_key]
+            await old_client.close()
+        
+        # Load markets to ensure proper initialization
+        try:
+            await exchange.load_markets()
+        except Exception:
+            if _ccxt_clients.get(key, (None,))[0] is exchange:
+                del _ccxt_clients[key]
+            await exchange.close()
+            raise
+        
+        return exchange
+    
     @staticmethod
     async def _get_binance_futures_balance(api_key: str, api_secret: str) -> float:
-        """Get Binance USDT-M Futures balance"""
+        """Get Binance USDT-M Futures balance, from the account's user-data stream while it is connected"""
+        stream = _binance_streams.get(api_key)
+        if stream is not None:
+            stream.touch()
+            if stream.connected and stream.balance is not None:
+                return stream.balance
+        
         try:
-            url = "https://fapi.binance.com/fapi/v2/account"
+            path = "/fapi/v2/account"
             timestamp = int(time.time() * 1000)
             
             params = {
@@ -77,11 +258,7 @@ class BalanceChecker:
             }
             
             query_string = urlencode(params)
-            signature = hmac.new(
-                api_secret.encode('utf-8'),
-                query_string.encode('utf-8'),
-                hashlib.sha256
-            ).hexdigest()
+            signature = _sign(api_secret, query_string.encode('utf-8')).hexdigest()
             
             params['signature'] = signature
             
@@ -89,15 +266,21 @@ class BalanceChecker:
                 'X-MBX-APIKEY': api_key
             }
             
-            response = requests.get(url, headers=headers, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                # Get USDT balance from futures account
-                usdt_balance = float(data.get('totalWalletBalance', 0))
-                return usdt_balance
-            else:
-                raise Exception(f"Binance API error: {response.text}")
+            session = await BalanceChecker._session_for('binance')
+            async with session.get(path, headers=headers, params=params) as response:
+                if response.status == 200:
+                    data = _json_loads(await response.read())
+                    # Get USDT balance from futures account
+                    usdt_balance = float(data.get('totalWalletBalance', 0))
+                    
+                    # The key works, so follow the account over WebSocket from here on
+                    BalanceStream.register(api_key).balance = usdt_balance
+                    return usdt_balance
+                else:
+                    body = await response.read()
+                    if _binance_key_rejected(response.status, body):
+                        BalanceStream.retire(api_key)
+                    raise Exception(f"Binance API error: {body.decode(errors='replace')}")
                 
         except Exception as e:
             logger.error(f"Error getting Binance balance: {e}")
@@ -107,22 +290,20 @@ class BalanceChecker:
     async def _get_bybit_futures_balance(api_key: str, api_secret: str) -> float:
         """Get Bybit USDT Perpetual balance"""
         try:
-            url = "https://api.bybit.com/v5/account/wallet-balance"
+            path = "/v5/account/wallet-balance"
             timestamp = str(int(time.time() * 1000))
             
+            # Only the USDT entry is needed, so have Bybit leave out every other coin
             params = {
-                'accountType': 'UNIFIED'
+                'accountType': 'UNIFIED',
+                'coin': 'USDT'
             }
             
             param_str = urlencode(params)
             
             # Create signature
             sign_payload = timestamp + api_key + '5000' + param_str
-            signature = hmac.new(
-                api_secret.encode('utf-8'),
-                sign_payload.encode('utf-8'),
-                hashlib.sha256
-            ).hexdigest()
+            signature = _sign(api_secret, sign_payload.encode('utf-8')).hexdigest()
             
             headers = {
                 'X-BAPI-API-KEY': api_key,
@@ -131,18 +312,18 @@ class BalanceChecker:
                 'X-BAPI-RECV-WINDOW': '5000'
             }
             
-            response = requests.get(url, headers=headers, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data['retCode'] == 0:
-                    coins = data['result']['list'][0]['coin']
-                    usdt_coin = next((coin for coin in coins if coin['coin'] == 'USDT'), None)
-                    return float(usdt_coin['walletBalance']) if usdt_coin else 0.0
+            session = await BalanceChecker._session_for('bybit')
+            async with session.get(path, headers=headers, params=params) as response:
+                if response.status == 200:
+                    data = _json_loads(await response.read())
+                    if data['retCode'] == 0:
+                        coins = data['result']['list'][0]['coin']
+                        usdt_coin = next((coin for coin in coins if coin['coin'] == 'USDT'), None)
+                        return float(usdt_coin['walletBalance']) if usdt_coin else 0.0
+                    else:
+                        raise Exception(f"Bybit API error: {data['retMsg']}")
                 else:
-                    raise Exception(f"Bybit API error: {data['retMsg']}")
-            else:
-                raise Exception(f"Bybit HTTP error: {response.status_code}")
+                    raise Exception(f"Bybit HTTP error: {response.status}")
                 
         except Exception as e:
             logger.error(f"Error getting Bybit balance: {e}")
@@ -152,13 +333,13 @@ class BalanceChecker:
     async def _get_okx_futures_balance(api_key: str, api_secret: str, passphrase: str) -> float:
         """Get OKX futures balance"""
         try:
-            url = "https://www.okx.com/api/v5/account/balance"
+            # Only the USDT entry is needed, so have OKX leave out every other currency
+            path = _OKX_BALANCE_PATH
             timestamp = str(int(time.time()))
             
-            # Create signature
-            message = timestamp + 'GET' + '/api/v5/account/balance'
+            # Create signature (OKX signs the query string as part of the request path)
             signature = base64.b64encode(
-                hmac.new(api_secret.encode('utf-8'), message.encode('utf-8'), hashlib.sha256).digest()
+                _sign(api_secret, timestamp.encode() + _OKX_SIGN_SUFFIX).digest()
             ).decode()
             
             headers = {
@@ -169,18 +350,18 @@ class BalanceChecker:
                 'Content-Type': 'application/json'
             }
             
-            response = requests.get(url, headers=headers)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data['code'] == '0':
-                    balances = data['data'][0]['details']
-                    usdt_balance = next((bal for bal in balances if bal['ccy'] == 'USDT'), None)
-                    return float(usdt_balance['availBal']) if usdt_balance else 0.0
+            session = await BalanceChecker._session_for('okx')
+            async with session.get(path, headers=headers) as response:
+                if response.status == 200:
+                    data = _json_loads(await response.read())
+                    if data['code'] == '0':
+                        balances = data['data'][0]['details']
+                        usdt_balance = next((bal for bal in balances if bal['ccy'] == 'USDT'), None)
+                        return float(usdt_balance['availBal']) if usdt_balance else 0.0
+                    else:
+                        raise Exception(f"OKX API error: {data['msg']}")
                 else:
-                    raise Exception(f"OKX API error: {data['msg']}")
-            else:
-                raise Exception(f"OKX HTTP error: {response.status_code}")
+                    raise Exception(f"OKX HTTP error: {response.status}")
                 
         except Exception as e:
             logger.error(f"Error getting OKX balance: {e}")
@@ -190,21 +371,14 @@ class BalanceChecker:
     async def _get_bitget_futures_balance(api_key: str, api_secret: str, passphrase: str) -> float:
         """Get Bitget futures balance"""
         try:
-            url = "https://api.bitget.com/api/mix/v1/account/accounts"
+            path = "/api/mix/v1/account/accounts"
             timestamp = str(int(time.time() * 1000))
             
             params = {
                 'productType': 'umcbl'  # USDT-M futures
             }
             
-            query_string = urlencode(params)
-            message = timestamp + "GET" + "/api/mix/v1/account/accounts?" + query_string
-            
-            signature = hmac.new(
-                api_secret.encode('utf-8'),
-                message.encode('utf-8'),
-                hashlib.sha256
-            ).hexdigest()
+            signature = _sign(api_secret, timestamp.encode() + _BITGET_SIGN_SUFFIX).hexdigest()
             
             headers = {
                 "ACCESS-KEY": api_key,
@@ -214,18 +388,18 @@ class BalanceChecker:
                 "Content-Type": "application/json"
             }
             
-            response = requests.get(url, headers=headers, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data['code'] == '00000':
-                    accounts = data['data']
-                    usdt_account = next((acc for acc in accounts if acc['marginCoin'] == 'USDT'), None)
-                    return float(usdt_account['available']) if usdt_account else 0.0
+            session = await BalanceChecker._session_for('bitget')
+            async with session.get(path, headers=headers, params=params) as response:
+                if response.status == 200:
+                    data = _json_loads(await response.read())
+                    if data['code'] == '00000':
+                        accounts = data['data']
+                        usdt_account = next((acc for acc in accounts if acc['marginCoin'] == 'USDT'), None)
+                        return float(usdt_account['available']) if usdt_account else 0.0
+                    else:
+                        raise Exception(f"Bitget API error: {data['msg']}")
                 else:
-                    raise Exception(f"Bitget API error: {data['msg']}")
-            else:
-                raise Exception(f"Bitget HTTP error: {response.status_code}")
+                    raise Exception(f"Bitget HTTP error: {response.status}")
                 
         except Exception as e:
             logger.error(f"Error getting Bitget balance: {e}")
@@ -235,15 +409,11 @@ class BalanceChecker:
     async def _get_mexc_futures_balance(api_key: str, api_secret: str) -> float:
         """Get MEXC futures balance"""
         try:
-            url = "https://contract.mexc.com/api/v1/private/account/assets"
+            path = "/api/v1/private/account/assets"
             timestamp = str(int(time.time() * 1000))
             
             query_string = f"timestamp={timestamp}"
-            signature = hmac.new(
-                api_secret.encode('utf-8'),
-                query_string.encode('utf-8'),
-                hashlib.sha256
-            ).hexdigest()
+            signature = _sign(api_secret, query_string.encode('utf-8')).hexdigest()
             
             headers = {
                 "ApiKey": api_key,
@@ -256,18 +426,18 @@ class BalanceChecker:
                 "timestamp": timestamp
             }
             
-            response = requests.get(url, headers=headers, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data['success']:
-                    assets = data['data']
-                    usdt_asset = next((asset for asset in assets if asset['currency'] == 'USDT'), None)
-                    return float(usdt_asset['availableBalance']) if usdt_asset else 0.0
+            session = await BalanceChecker._session_for('mexc')
+            async with session.get(path, headers=headers, params=params) as response:
+                if response.status == 200:
+                    data = _json_loads(await response.read())
+                    if data['success']:
+                        assets = data['data']
+                        usdt_asset = next((asset for asset in assets if asset['currency'] == 'USDT'), None)
+                        return float(usdt_asset['availableBalance']) if usdt_asset else 0.0
+                    else:
+                        raise Exception(f"MEXC API error: {data.get('message', 'Unknown error')}")
                 else:
-                    raise Exception(f"MEXC API error: {data.get('message', 'Unknown error')}")
-            else:
-                raise Exception(f"MEXC HTTP error: {response.status_code}")
+                    raise Exception(f"MEXC HTTP error: {response.status}")
                 
         except Exception as e:
             logger.error(f"Error getting MEXC balance: {e}")
@@ -277,17 +447,14 @@ class BalanceChecker:
     async def _get_kucoin_futures_balance(api_key: str, api_secret: str, passphrase: str) -> float:
         """Get KuCoin futures balance"""
         try:
-            url = "https://api-futures.kucoin.com/api/v1/account-overview"
+            path = "/api/v1/account-overview"
             timestamp = str(int(time.time() * 1000))
             
-            str_to_sign = timestamp + 'GET' + '/api/v1/account-overview'
             signature = base64.b64encode(
-                hmac.new(api_secret.encode('utf-8'), str_to_sign.encode('utf-8'), hashlib.sha256).digest()
+                _sign(api_secret, timestamp.encode() + _KUCOIN_SIGN_SUFFIX).digest()
             ).decode()
             
-            passphrase_encrypted = base64.b64encode(
-                hmac.new(api_secret.encode('utf-8'), passphrase.encode('utf-8'), hashlib.sha256).digest()
-            ).decode()
+            passphrase_encrypted = _kucoin_passphrase(api_secret, passphrase)
             
             headers = {
                 'KC-API-SIGN': signature,
@@ -297,17 +464,17 @@ class BalanceChecker:
                 'KC-API-KEY-VERSION': '2'
             }
             
-            response = requests.get(url, headers=headers)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data['code'] == '200000':
-                    account_equity = float(data['data']['accountEquity'])
-                    return account_equity
+            session = await BalanceChecker._session_for('kucoin')
+            async with session.get(path, headers=headers) as response:
+                if response.status == 200:
+                    data = _json_loads(await response.read())
+                    if data['code'] == '200000':
+                        account_equity = float(data['data']['accountEquity'])
+                        return account_equity
+                    else:
+                        raise Exception(f"KuCoin API error: {data['msg']}")
                 else:
-                    raise Exception(f"KuCoin API error: {data['msg']}")
-            else:
-                raise Exception(f"KuCoin HTTP error: {response.status_code}")
+                    raise Exception(f"KuCoin HTTP error: {response.status}")
                 
         except Exception as e:
             logger.error(f"Error getting KuCoin balance: {e}")
@@ -317,19 +484,11 @@ class BalanceChecker:
     async def _get_gate_futures_balance(api_key: str, api_secret: str) -> float:
         """Get Gate.io futures balance"""
         try:
-            url = "https://api.gateio.ws/api/v4/futures/usdt/accounts"
+            path = "/api/v4/futures/usdt/accounts"
             timestamp = str(int(time.time()))
             
             # Create signature for Gate.io
-            query_string = ""
-            body_hash = hashlib.sha512("".encode('utf-8')).hexdigest()
-            sign_string = f"GET\n/api/v4/futures/usdt/accounts\n{query_string}\n{body_hash}\n{timestamp}"
-            
-            signature = hmac.new(
-                api_secret.encode('utf-8'),
-                sign_string.encode('utf-8'),
-                hashlib.sha512
-            ).hexdigest()
+            signature = _sign(api_secret, _GATE_SIGN_PREFIX + timestamp.encode(), hashlib.sha512).hexdigest()
             
             headers = {
                 'Accept': 'application/json',
@@ -339,14 +498,14 @@ class BalanceChecker:
                 'SIGN': signature
             }
             
-            response = requests.get(url, headers=headers)
-            
-            if response.status_code == 200:
-                data = response.json()
-                available_balance = float(data.get('available', 0))
-                return available_balance
-            else:
-                raise Exception(f"Gate.io HTTP error: {response.status_code}")
+            session = await BalanceChecker._session_for('gate')
+            async with session.get(path, headers=headers) as response:
+                if response.status == 200:
+                    data = _json_loads(await response.read())
+                    available_balance = float(data.get('available', 0))
+                    return available_balance
+                else:
+                    raise Exception(f"Gate.io HTTP error: {response.status}")
                 
         except Exception as e:
             logger.error(f"Error getting Gate.io balance: {e}")
@@ -356,7 +515,7 @@ class BalanceChecker:
     async def _get_huobi_futures_balance(api_key: str, api_secret: str) -> float:
         """Get Huobi futures balance"""
         try:
-            url = "https://api.hbdm.com/linear-swap-api/v1/swap_account_info"
+            path = "/linear-swap-api/v1/swap_account_info"
             timestamp = str(int(time.time()))
             
             params = {
@@ -366,29 +525,26 @@ class BalanceChecker:
                 'Timestamp': timestamp
             }
             
-            # Create signature
-            sorted_params = sorted(params.items())
-            query_string = '&'.join([f"{k}={v}" for k, v in sorted_params])
-            
-            payload = f"GET\napi.hbdm.com\n/linear-swap-api/v1/swap_account_info\n{query_string}"
+            # Create signature (the params above are already in the sorted order Huobi signs)
+            payload = _HUOBI_SIGN_PREFIX + api_key.encode('utf-8') + _HUOBI_SIGN_PARAMS + timestamp.encode()
             signature = base64.b64encode(
-                hmac.new(api_secret.encode('utf-8'), payload.encode('utf-8'), hashlib.sha256).digest()
+                _sign(api_secret, payload).digest()
             ).decode()
             
             params['Signature'] = signature
             
-            response = requests.get(url, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data['status'] == 'ok':
-                    accounts = data['data']
-                    usdt_account = next((acc for acc in accounts if acc['margin_asset'] == 'USDT'), None)
-                    return float(usdt_account['margin_balance']) if usdt_account else 0.0
+            session = await BalanceChecker._session_for('huobi')
+            async with session.get(path, params=params) as response:
+                if response.status == 200:
+                    data = _json_loads(await response.read())
+                    if data['status'] == 'ok':
+                        accounts = data['data']
+                        usdt_account = next((acc for acc in accounts if acc['margin_asset'] == 'USDT'), None)
+                        return float(usdt_account['margin_balance']) if usdt_account else 0.0
+                    else:
+                        raise Exception(f"Huobi API error: {data.get('err_msg', 'Unknown error')}")
                 else:
-                    raise Exception(f"Huobi API error: {data.get('err_msg', 'Unknown error')}")
-            else:
-                raise Exception(f"Huobi HTTP error: {response.status_code}")
+                    raise Exception(f"Huobi HTTP error: {response.status}")
                 
         except Exception as e:
             logger.error(f"Error getting Huobi balance: {e}")
@@ -398,15 +554,11 @@ class BalanceChecker:
     async def _get_bingx_futures_balance(api_key: str, api_secret: str) -> float:
         """Get BingX futures balance"""
         try:
-            url = "https://open-api.bingx.com/openApi/swap/v2/user/balance"
+            path = "/openApi/swap/v2/user/balance"
             timestamp = str(int(time.time() * 1000))
             
             query_string = f"timestamp={timestamp}"
-            signature = hmac.new(
-                api_secret.encode('utf-8'),
-                query_string.encode('utf-8'),
-                hashlib.sha256
-            ).hexdigest()
+            signature = _sign(api_secret, query_string.encode('utf-8')).hexdigest()
             
             headers = {
                 'X-BX-APIKEY': api_key,
@@ -418,18 +570,18 @@ class BalanceChecker:
                 'signature': signature
             }
             
-            response = requests.get(url, headers=headers, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data['code'] == 0:
-                    balance_info = data['data']['balance']
-                    available_margin = float(balance_info.get('availableMargin', 0))
-                    return available_margin
+            session = await BalanceChecker._session_for('bingx')
+            async with session.get(path, headers=headers, params=params) as response:
+                if response.status == 200:
+                    data = _json_loads(await response.read())
+                    if data['code'] == 0:
+                        balance_info = data['data']['balance']
+                        available_margin = float(balance_info.get('availableMargin', 0))
+                        return available_margin
+                    else:
+                        raise Exception(f"BingX API error: {data['msg']}")
                 else:
-                    raise Exception(f"BingX API error: {data['msg']}")
-            else:
-                raise Exception(f"BingX HTTP error: {response.status_code}")
+                    raise Exception(f"BingX HTTP error: {response.status}")
                 
         except Exception as e:
             logger.error(f"Error getting BingX balance: {e}")
@@ -503,3 +655,163 @@ class BalanceChecker:
         except Exception as e:
             logger.error(f"Error getting MEXC balance: {e}")
             raise
+
+class BalanceStream:
+    """Binance USDT-M user-data stream that keeps one account's USDT wallet balance current"""
+    
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        self.balance: Optional[float] = None  # seeded from REST, then updated by ACCOUNT_UPDATE events
+        self.connected = False
+        self.last_used = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+    
+    @staticmethod
+    def register(api_key: str) -> 'BalanceStream':
+        """Return the running stream for api_key, starting one and evicting the least recently used if full"""
+        stream = _binance_streams.get(api_key)
+        if stream is not None:
+            stream.touch()
+            return stream
+        
+        stream = BalanceStream(api_key)
+        _binance_streams[api_key] = stream
+        stream.start()
+        while len(_binance_streams) > MAX_BALANCE_STREAMS:
+            _, evicted = _binance_streams.popitem(last=False)
+            evicted.cancel()
+        return stream
+    
+    @staticmethod
+    def retire(api_key: str):
+        """Stop and forget the stream for api_key, if there is one"""
+        stream = _binance_streams.pop(api_key, None)
+        if stream is not None:
+            stream.cancel()
+    
+    def touch(self):
+        """Record a balance lookup, keeping the stream alive and at the recently used end"""
+        self.last_used = time.monotonic()
+        if _binance_streams.get(self.api_key) is self:
+            _binance_streams.move_to_end(self.api_key)
+    
+    def start(self):
+        """Run the stream in the background, reconnecting until stopped"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    def cancel(self):
+        """Cancel the stream without waiting for it to close"""
+        self.connected = False
+        if self._task is not None:
+            self._task.cancel()
+    
+    async def stop(self):
+        """Cancel the stream and wait for it to close"""
+        self.cancel()
+        if self._task is not None:
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def _idle(self) -> bool:
+        """Whether nobody has asked for this balance in a while (e.g. the exchange was removed)"""
+        return time.monotonic() - self.last_used > STREAM_IDLE_TIMEOUT
+    
+    def _forget(self):
+        """Drop this stream from the registry (it is stopping on its own)"""
+        if _binance_streams.get(self.api_key) is self:
+            del _binance_streams[self.api_key]
+        self.connected = False
+    
+    async def _run(self):
+        headers = {'X-MBX-APIKEY': self.api_key}
+        failures = 0
+        while True:
+            try:
+                rest = await BalanceChecker._session_for('binance')
+                async with rest.post('/fapi/v1/listenKey', headers=headers) as response:
+                    body = await response.read()
+                    if response.status != 200:
+                        if _binance_key_rejected(response.status, body):
+                            logger.warning("Binance rejected API key; stopping its balance stream")
+                            self._forget()
+                            return
+                        raise Exception(f"listenKey error: {body.decode(errors='replace')}")
+                    listen_key = _json_loads(body)['listenKey']
+                
+                renew = asyncio.create_task(self._renew_listen_key(headers))
+                try:
+                    ws_session = await BalanceChecker._session_for('binance_stream')
+                    async with ws_session.ws_connect(f'/ws/{listen_key}', heartbeat=60) as ws:
+                        # Updates may have been missed while disconnected; the next lookup re-seeds over REST
+                        self.balance = None
+                        self.connected = True
+                        failures = 0
+                        async for msg in ws:
+                            if msg.type != aiohttp.WSMsgType.TEXT:
+                                break
+                            event = _json_loads(msg.data)
+                            if event.get('e') == 'ACCOUNT_UPDATE':
+                                self._apply_account_update(event)
+                            elif event.get('e') == 'listenKeyExpired':
+                                break
+                finally:
+                    self.connected = False
+                    renew.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Binance balance stream error: {e}")
+            
+            if _binance_streams.get(self.api_key) is not self:
+                return
+            if self._idle():
+                self._forget()
+                return
+            await asyncio.sleep(min(STREAM_RECONNECT_DELAY * 2 ** failures, STREAM_MAX_RECONNECT_DELAY))
+            failures += 1
+    
+    async def _renew_listen_key(self, headers: Dict[str, str]):
+        while True:
+            await asyncio.sleep(LISTEN_KEY_RENEW_INTERVAL)
+            
+            if self._idle():
+                self._forget()
+                self.cancel()
+                return
+            
+            try:
+                rest = await BalanceChecker._session_for('binance')
+                async with rest.put('/fapi/v1/listenKey', headers=headers) as response:
+                    if response.status != 200:
+                        body = await response.read()
+                        if _binance_key_rejected(response.status, body):
+                            logger.warning("Binance rejected API key; stopping its balance stream")
+                            self._forget()
+                            self.cancel()
+                            return
+                        logger.error(f"Binance listenKey renewal failed: {body.decode(errors='replace')}")
+            except aiohttp.ClientError as e:
+                logger.error(f"Binance listenKey renewal failed: {e}")
+    
+    def _apply_account_update(self, event: Dict):
+        for asset in event.get('a', {}).get('B', ()):
+            if asset.get('a') == 'USDT':
+                self.balance = float(asset['wb'])
+                return
+
+# exchange_name -> (direct REST balance fetcher, whether it takes the passphrase); others go through ccxt
+_DISPATCH = {
+    'binance': (BalanceChecker._get_binance_futures_balance, False),
+    'bybit': (BalanceChecker._get_bybit_futures_balance, False),
+    'okx': (BalanceChecker._get_okx_futures_balance, True),
+    'bitget': (BalanceChecker._get_bitget_futures_balance, True),
+    'mexc': (BalanceChecker._get_mexc_futures_balance, False),
+    'kucoin': (BalanceChecker._get_kucoin_futures_balance, True),
+    'gate': (BalanceChecker._get_gate_futures_balance, False),
+    'huobi': (BalanceChecker._get_huobi_futures_balance, False),
+    'bingx': (BalanceChecker._get_bingx_futures_balance, False),
+}
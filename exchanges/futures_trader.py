@@ -1,6 +1,6 @@
 import asyncio
 import logging
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 import ccxt
 from config.settings import Config
 from exchanges.auth_manager import ExchangeAuthManager
@@ -209,19 +209,28 @@ class FuturesTrader:
                 'error': str(e)
             }
     
-    async def execute_signal_trade(self, user: Dict, signal: Dict):
-        """Execute signal trade for user"""
+    async def execute_signal_trade(self, user: Dict, signal: Dict,
+                                   user_exchanges: List[Dict] = None) -> List[tuple]:
+        """Execute signal trade for user and return the trade_executions rows to record"""
+        executions = []
         try:
-            # Get user exchanges and execute trades
-            from database.models import ExchangeModel
-            exchange_model = ExchangeModel(self.auth_manager.db)
-            user_exchanges = exchange_model.get_user_exchanges(user['id'])
+            # Get user exchanges (unless the caller already loaded them) and execute trades
+            if user_exchanges is None:
+                from database.models import ExchangeModel
+                exchange_model = ExchangeModel(self.auth_manager.db)
+                user_exchanges = await exchange_model.a_get_user_exchanges(user['id'])
             
             for exchange_config in user_exchanges:
                 if exchange_config.get('auto_trade', True):
                     result = await self.execute_trade(exchange_config, signal, user)
                     if result['success']:
+                        executions.append((
+                            signal['id'], user['id'], exchange_config['exchange_name'],
+                            signal['symbol'], result['side'].upper(), result['quantity'],
+                            result['entry_price'], result['order_id']
+                        ))
                         logger.info(f"Signal executed for user {user['id']} on {exchange_config['exchange_name']}")
                         
         except Exception as e:
             logger.error(f"Error executing signal trade: {e}")
+        return executions
@@ -2,11 +2,14 @@ import logging
 import sys
 import os
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters
 from telegram import Update
+from telegram.request import HTTPXRequest
 from config.settings import Config
 from bot.enhanced_user_handlers import EnhancedUserHandlers
 from bot.admin_handlers import AdminHandlers
+from exchanges.balance_checker import BalanceChecker
 
 # Configure logging
 logging.basicConfig(
@@ -19,7 +22,7 @@ logging.basicConfig(
 
 os.makedirs('logs', exist_ok=True)
 file_handler = logging.FileHandler('logs/bot.log', encoding='utf-8')
-file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+file_handler.setFormatter(Config.LOG_FORMATTER)
 
 logger = logging.getLogger(__name__)
 logger.addHandler(file_handler)
@@ -32,28 +35,39 @@ async def main():
     try:
         Config.validate()
         
+        # Thread pool used by asyncio.to_thread for credential crypto work
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=8))
+        
         # Initialize enhanced handlers
         user_handlers = EnhancedUserHandlers()
         admin_handlers = AdminHandlers()
+        await user_handlers.auth_manager.start()
+        
+        # Outbound calls (reply_text, edit_message_text) share one large connection pool
+        request = HTTPXRequest(
+            connection_pool_size=64,
+            connect_timeout=30,
+            read_timeout=30,
+            write_timeout=30,
+            pool_timeout=30
+        )
         
         application = (
             Application.builder()
             .token(Config.TELEGRAM_TOKEN)
-            .connect_timeout(30)
-            .read_timeout(30)
-            .write_timeout(30)
-            .pool_timeout(30)
+            .request(request)
+            .concurrent_updates(True)
             .build()
         )
         
-        # Enhanced user command handlers
+        # Enhanced user command handlers (network-bound ones run without blocking the dispatcher)
         application.add_handler(CommandHandler("start", user_handlers.start_command))
         application.add_handler(CommandHandler("help", user_handlers.help_command))
-        application.add_handler(CommandHandler("connect", user_handlers.connect_command))
-        application.add_handler(CommandHandler("balance", user_handlers.balance_command))
-        application.add_handler(CommandHandler("subscribe", user_handlers.subscribe_command))
+        application.add_handler(CommandHandler("connect", user_handlers.connect_command, block=False))
+        application.add_handler(CommandHandler("balance", user_handlers.balance_command, block=False))
+        application.add_handler(CommandHandler("subscribe", user_handlers.subscribe_command, block=False))
         application.add_handler(CommandHandler("settings", user_handlers.settings_command))
-        application.add_handler(CommandHandler("trades", user_handlers.trades_command))
+        application.add_handler(CommandHandler("trades", user_handlers.trades_command, block=False))
         
         # Admin command handlers
         application.add_handler(CommandHandler("admin", admin_handlers.admin_panel))
@@ -61,7 +75,7 @@ async def main():
         application.add_handler(CommandHandler("broadcast", admin_handlers.broadcast_command))
         
         # Enhanced callback query handlers
-        application.add_handler(CallbackQueryHandler(user_handlers.connection_callback))
+        application.add_handler(CallbackQueryHandler(user_handlers.connection_callback, block=False))
         application.add_handler(CallbackQueryHandler(admin_handlers.admin_callback_handler, pattern="^admin_"))
         
         # Enhanced message handler for credentials
@@ -90,8 +104,10 @@ async def main():
         print("📝 Use Ctrl+C to stop the bot")
         
         await application.start()
+        # Long-poll and only receive the update types the handlers consume
         await application.updater.start_polling(
-            allowed_updates=Update.ALL_TYPES,
+            timeout=30,
+            allowed_updates=[Update.MESSAGE, Update.CALLBACK_QUERY],
             drop_pending_updates=True
         )
         
@@ -103,6 +119,8 @@ async def main():
             await application.updater.stop()
             await application.stop()
             await application.shutdown()
+            await BalanceChecker.close()
+            await user_handlers.auth_manager.close()
             
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
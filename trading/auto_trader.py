@@ -1,6 +1,6 @@
 import asyncio
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from database.models import Database, TradeModel, ExchangeModel, UserModel
 from exchanges.futures_trader import FuturesTrader
 from config.settings import Config
@@ -43,16 +43,23 @@ class AutoTrader:
         """Monitor all open positions"""
         try:
             # Get all open trades
-            open_trades = self.trade_model.get_open_trades()
+            open_trades = await self.trade_model.a_get_open_trades()
             
+            updates = []
             for trade in open_trades:
-                await self.update_trade_pnl(trade)
+                update = await self.calculate_trade_pnl(trade)
+                if update:
+                    updates.append(update)
+            
+            # Write every P&L refresh in one batch
+            if updates:
+                await self.trade_model.a_update_trade_pnl_bulk(updates)
                 
         except Exception as e:
             logger.error(f"Error monitoring positions: {e}")
     
-    async def update_trade_pnl(self, trade: Dict):
-        """Update trade P&L"""
+    async def calculate_trade_pnl(self, trade: Dict) -> Optional[Tuple[float, float, int]]:
+        """Return a (pnl, current_price, trade_id) update for the trade, or None"""
         try:
             # Get current price and calculate P&L
             current_price = await self.futures_trader.get_current_price(
@@ -66,16 +73,16 @@ class AutoTrader:
                 else:
                     pnl = (trade['entry_price'] - current_price) * trade['quantity']
                 
-                # Update in database
-                self.trade_model.update_trade_pnl(trade['id'], pnl, current_price)
+                return (pnl, current_price, trade['id'])
                 
         except Exception as e:
             logger.error(f"Error updating trade P&L: {e}")
+        return None
     
     async def check_stop_losses(self):
         """Check and execute stop losses"""
         try:
-            open_trades = self.trade_model.get_open_trades()
+            open_trades = await self.trade_model.a_get_open_trades()
             
             for trade in open_trades:
                 if not trade['stop_loss']:
@@ -102,7 +109,7 @@ class AutoTrader:
     async def check_take_profits(self):
         """Check and execute take profits"""
         try:
-            open_trades = self.trade_model.get_open_trades()
+            open_trades = await self.trade_model.a_get_open_trades()
             
             for trade in open_trades:
                 if not trade['take_profit']:
@@ -134,7 +141,7 @@ class AutoTrader:
             
             if result['success']:
                 # Update trade as closed
-                self.trade_model.close_trade(
+                await self.trade_model.a_close_trade(
                     trade['id'], 
                     result['close_price'], 
                     result['pnl'],
@@ -150,7 +157,7 @@ class AutoTrader:
         """Execute a trade based on signal"""
         try:
             # Get user's exchanges
-            user_exchanges = self.exchange_model.get_user_exchanges(user['id'])
+            user_exchanges = await self.exchange_model.a_get_user_exchanges(user['id'])
             
             for exchange in user_exchanges:
                 if not exchange.get('auto_trade', True):
@@ -163,9 +170,9 @@ class AutoTrader:
                 
                 if result['success']:
                     # Record trade in database
-                    self.trade_model.create_trade(
+                    await self.trade_model.a_create_trade(
                         user['id'],
-                        exchange['id'],
+                        exchange['exchange_name'],
                         signal['id'],
                         signal['symbol'],
                         signal['action'],
@@ -1,7 +1,7 @@
 import asyncio
 import logging
 from typing import Dict, List
-from database.models import Database, SignalModel, UserModel
+from database.models import Database, SignalModel, UserModel, TradeModel, ExchangeModel
 from exchanges.futures_trader import FuturesTrader
 from config.settings import Config
 
@@ -12,6 +12,8 @@ class SignalProcessor:
         self.db = Database()
         self.signal_model = SignalModel(self.db)
         self.user_model = UserModel(self.db)
+        self.trade_model = TradeModel(self.db)
+        self.exchange_model = ExchangeModel(self.db)
         self.futures_trader = FuturesTrader()
         self.is_monitoring = False
         self.monitoring_task = None
@@ -40,7 +42,7 @@ class SignalProcessor:
         """Process pending signals"""
         try:
             # Get pending signals
-            pending_signals = self.signal_model.get_pending_signals()
+            pending_signals = await self.signal_model.a_get_pending_signals()
             
             for signal in pending_signals:
                 await self.execute_signal(signal)
@@ -52,18 +54,34 @@ class SignalProcessor:
         """Execute a trading signal"""
         try:
             # Get all subscribed users
-            subscribers = self.user_model.get_subscribed_users()
+            subscribers = await self.user_model.a_get_subscribed_users()
             
-            for user in subscribers:
+            # Load every subscriber's exchanges concurrently
+            user_exchanges = await asyncio.gather(
+                *[self.exchange_model.a_get_user_exchanges(user['id']) for user in subscribers],
+                return_exceptions=True
+            )
+            
+            executions = []
+            for user, exchanges in zip(subscribers, user_exchanges):
                 try:
+                    if isinstance(exchanges, Exception):
+                        raise exchanges
+                    
                     # Execute trade for each user
-                    await self.futures_trader.execute_signal_trade(user, signal)
+                    executions.extend(await self.futures_trader.execute_signal_trade(user, signal, exchanges))
                     
                 except Exception as e:
                     logger.error(f"Error executing signal for user {user['id']}: {e}")
             
-            # Mark signal as processed
-            self.signal_model.mark_signal_processed(signal['id'])
+            # Mark signal as processed first: the orders are live, so a failed write below must not re-run them
+            await self.signal_model.a_mark_signal_processed(signal['id'])
+            
+            # Record every execution of this signal in one write
+            try:
+                await self.trade_model.a_record_trade_executions_bulk(executions)
+            except Exception as e:
+                logger.error(f"Error recording executions of signal {signal['id']}: {e}; rows: {executions}")
             
         except Exception as e:
             logger.error(f"Error executing signal {signal['id']}: {e}")
@@ -71,7 +89,7 @@ class SignalProcessor:
     async def broadcast_signal(self, signal: Dict, bot_instance):
         """Broadcast signal to all subscribers"""
         try:
-            subscribers = self.user_model.get_subscribed_users()
+            subscribers = await self.user_model.a_get_subscribed_users()
             
             signal_text = (
                 f"🚀 *NEW TRADING SIGNAL* 🚀\n\n"
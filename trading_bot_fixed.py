@@ -89,9 +89,9 @@ def init_db():
         id INTEGER PRIMARY KEY,
         user_id INTEGER,
         exchange_name TEXT,
-        api_key_encrypted TEXT,
-        api_secret_encrypted TEXT,
-        passphrase_encrypted TEXT,
+        api_key_encrypted BLOB,
+        api_secret_encrypted BLOB,
+        passphrase_encrypted BLOB,
         is_active BOOLEAN DEFAULT 1,
         FOREIGN KEY(user_id) REFERENCES users(id)
     )''')